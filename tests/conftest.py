@@ -0,0 +1,119 @@
+import io
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+
+import pytest
+
+# Make the inner ``yonote_cli`` package importable from a source checkout.
+_SRC = str(Path(__file__).resolve().parents[1] / "yonote_cli")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
+
+# Attributes the command handlers read from parsed arguments.  Tests override
+# only the fields they care about.
+_ARG_DEFAULTS = MappingProxyType(
+    {
+        "query": None,
+        "users": (),
+        "promote": False,
+        "demote": False,
+        "suspend": False,
+        "activate": False,
+        "workers": 4,
+        "refresh_cache": False,
+    }
+)
+
+
+@pytest.fixture(scope="session")
+def cli_parser():
+    """Build the ``yonote`` argument parser once for the whole session."""
+    from yonote_cli.__main__ import build_parser
+
+    return build_parser()
+
+
+@pytest.fixture(scope="session")
+def admin():
+    """Import the admin command module on first use."""
+    import yonote_cli.commands.admin as module
+
+    return module
+
+
+@pytest.fixture(scope="session")
+def make_args():
+    """Return a factory for handler ``args`` namespaces with sane defaults."""
+
+    def _make(**overrides):
+        return SimpleNamespace(**{**_ARG_DEFAULTS, **overrides})
+
+    return _make
+
+
+@pytest.fixture(scope="session")
+def http():
+    """Import the HTTP helper module on first use."""
+    import yonote_cli.core.http as module
+
+    return module
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    """Point the cache file at ``tmp_path`` and start with no cached ids.
+
+    Keeps tests away from the developer's ``~/.yonote-cache.json``, including
+    the ``flush_ids`` call registered at exit: ``_ids_dirty`` is restored to
+    false after each test, so it writes nothing.
+    """
+    import yonote_cli.core.cache as cache
+
+    monkeypatch.setattr(cache, "CACHE_PATH", tmp_path / "cache.json")
+    monkeypatch.setattr(cache, "_cache_memo", None)
+    monkeypatch.setattr(cache, "_ids", None)
+    monkeypatch.setattr(cache, "_ids_dirty", False)
+
+
+@pytest.fixture(autouse=True)
+def _admin_defaults(request, monkeypatch):
+    """Stub config and id lookups for tests that use the ``admin`` fixture."""
+    if "admin" not in request.fixturenames:
+        return
+    admin = request.getfixturevalue("admin")
+    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
+    monkeypatch.setattr(admin, "lookup_id", lambda kind, base, ident: None)
+    monkeypatch.setattr(admin, "_resolve_user_id", lambda base, token, ident: ident)
+    monkeypatch.setattr(admin, "_resolve_group_id", lambda base, token, ident: ident)
+
+
+@pytest.fixture
+def http_calls(admin, monkeypatch):
+    """Record ``(url, payload)`` for every ``admin.http_json`` call."""
+    calls = []
+
+    def fake_http_json(method, url, token, payload=None):
+        calls.append((url, payload))
+        return {"data": {}}
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    return calls
+
+
+@pytest.fixture(scope="session")
+def stdout_of():
+    """Return a helper running ``func(*args)`` and returning what it printed.
+
+    Output goes to an in-memory buffer instead of pytest's capture machinery,
+    which is all the stdout-only assertions need.
+    """
+
+    def _run(func, *args):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            func(*args)
+        return buf.getvalue()
+
+    return _run
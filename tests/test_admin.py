@@ -0,0 +1,448 @@
+import sys
+import time
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "query, rows, expected",
+    [
+        (
+            None,
+            [{"id": "1", "email": "a@example.com", "name": "A", "isAdmin": False, "isSuspended": False}],
+            {"filter": "all"},
+        ),
+        ("smith", [], {"filter": "all", "query": "smith"}),
+    ],
+)
+def test_admin_users_list(admin, monkeypatch, stdout_of, query, rows, expected, make_args):
+    captured = {}
+
+    def fake_fetch_all(base, token, path, *, params=None, **_):
+        captured["params"] = params
+        return rows
+
+    monkeypatch.setattr(admin, "fetch_all_concurrent", fake_fetch_all)
+
+    out = stdout_of(admin.cmd_admin_users_list, make_args(query=query))
+    assert captured["params"] == expected
+    for row in rows:
+        assert row["email"] in out
+
+
+def test_admin_users_add(admin, http_calls, capsys, make_args):
+    args = make_args(emails=["a@example.com", "b@example.com", "a@example.com"])
+    admin.cmd_admin_users_add(args)
+    out, _ = capsys.readouterr()
+    assert "invited a@example.com" in out
+    assert "invited b@example.com" in out
+    assert http_calls == [
+        ("base/users.invite", {"emails": ["a@example.com", "b@example.com"]}),
+    ]
+
+
+def test_admin_users_add_continues_on_error(admin, monkeypatch, capsys, make_args):
+    calls = []
+
+    def fake_http_json(method, url, token, payload):
+        calls.append((url, payload))
+        if "b@example.com" in payload["emails"]:
+            raise admin.ApiError("[HTTP 400] Invalid email", 400)
+        return {}
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+
+    args = make_args(emails=["a@example.com", "b@example.com", "c@example.com"])
+    admin.cmd_admin_users_add(args)
+    out, err = capsys.readouterr()
+    assert "invited a@example.com" in out
+    assert "invited c@example.com" in out
+    assert "failed b@example.com" in err
+    assert calls == [
+        ("base/users.invite", {"emails": ["a@example.com", "b@example.com", "c@example.com"]}),
+        ("base/users.invite", {"emails": ["a@example.com"]}),
+        ("base/users.invite", {"emails": ["b@example.com"]}),
+        ("base/users.invite", {"emails": ["c@example.com"]}),
+    ]
+
+
+@pytest.mark.parametrize("status", [None, 401, 500])
+def test_admin_users_add_does_not_retry_other_failures(admin, monkeypatch, make_args, status):
+    calls = []
+
+    def fake_http_json(method, url, token, payload):
+        calls.append(payload["emails"])
+        raise admin.ApiError("failed", status)
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    with pytest.raises(SystemExit) as exc:
+        admin.cmd_admin_users_add(make_args(emails=["a@example.com", "b@example.com"]))
+    assert exc.value.code == 2
+    assert calls == [["a@example.com", "b@example.com"]]
+
+
+def test_admin_users_delete_reports_all_missing(admin, monkeypatch, capsys, make_args):
+    calls = []
+
+    def fake_resolve(base, token, ident):
+        if ident == "good@example.com":
+            return "uid1"
+        print(f"User not found: {ident}", file=sys.stderr)
+        raise SystemExit(1)
+
+    def fake_http_json(method, url, token, payload):
+        calls.append(payload["id"])
+
+    monkeypatch.setattr(admin, "_resolve_user_id", fake_resolve)
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+
+    args = make_args(users=["good@example.com", "bad1@example.com", "bad2@example.com"])
+    with pytest.raises(SystemExit):
+        admin.cmd_admin_users_delete(args)
+    _, err = capsys.readouterr()
+    assert "User not found: bad1@example.com" in err
+    assert "User not found: bad2@example.com" in err
+    assert calls == ["uid1"]
+
+
+def test_admin_users_delete_continues_after_failed_call(admin, monkeypatch, capsys, make_args):
+    def fake_http_json(method, url, token, payload):
+        if payload["id"] == "a@example.com":
+            raise admin.ApiError("[HTTP 400] Cannot delete", 400)
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    args = make_args(users=["a@example.com", "b@example.com"])
+    with pytest.raises(SystemExit) as exc:
+        admin.cmd_admin_users_delete(args)
+    assert exc.value.code == 1
+    out, _ = capsys.readouterr()
+    assert out == "delete b@example.com\n"
+
+
+def test_admin_users_update_promote(admin, http_calls, monkeypatch, make_args):
+    monkeypatch.setattr(admin, "_resolve_user_id", lambda base, token, ident: ident + "_id")
+
+    args = make_args(users=["u1", "u2"], promote=True)
+    admin.cmd_admin_users_update(args)
+    # Requests run on a thread pool, so only the set of calls is fixed.
+    assert sorted(http_calls, key=str) == [
+        ("base/users.promote", {"id": "u1_id"}),
+        ("base/users.promote", {"id": "u2_id"}),
+    ]
+
+
+def test_resolve_user_ids_lists_users_once_for_many_names(admin, monkeypatch):
+    listings, searched, remembered = [], [], {}
+    users = [{"id": f"uid{i}", "email": f"u{i}@example.com"} for i in range(6)]
+
+    def fake_fetch_all(base, token, path, params=None, workers=4, desc=None):
+        listings.append(path)
+        return users
+
+    def fake_resolve(base, token, ident):
+        searched.append(ident)
+        raise SystemExit(1)
+
+    monkeypatch.setattr(admin, "fetch_all_concurrent", fake_fetch_all)
+    monkeypatch.setattr(admin, "_resolve_user_id", fake_resolve)
+    monkeypatch.setattr(admin, "remember_ids", lambda kind, base, ids: remembered.update(ids))
+    uuid = "123e4567-e89b-12d3-a456-426614174000"
+    idents = [f"U{i}@example.com" for i in range(5)] + ["gone@example.com", uuid]
+    uids = admin._resolve_user_ids("base", "token", idents, workers=2)
+    assert uids == [f"uid{i}" for i in range(5)] + [None, uuid]
+    assert listings == ["/users.list"]
+    # Only the name the listing lacks falls back to a search.
+    assert searched == ["gone@example.com"]
+    assert len(remembered) == 6
+
+
+def test_admin_users_update_runs_all_actions(admin, http_calls, monkeypatch, stdout_of, make_args):
+    monkeypatch.setattr(admin, "_resolve_user_id", lambda base, token, ident: ident + "_id")
+
+    args = make_args(users=["u1", "u2"], promote=True, suspend=True)
+    out = stdout_of(admin.cmd_admin_users_update, args)
+    assert len(http_calls) == 4
+    assert ("base/users.suspend", {"id": "u2_id"}) in http_calls
+    # Output follows the action and user order, not completion order.
+    assert out == "promote u1\npromote u2\nsuspend u1\nsuspend u2\n"
+
+
+def test_admin_groups_memberships_paginates(admin, monkeypatch, stdout_of, make_args):
+    offsets = []
+
+    def fake_http_json(method, url, token, payload):
+        offsets.append(payload["offset"])
+        if payload["offset"] == 0:
+            return {"data": {"users": [{"id": "1", "email": "u1@example.com", "name": "U1"}]}}
+        elif payload["offset"] == 1:
+            return {"data": {"users": [{"id": "2", "email": "u2@example.com", "name": "U2"}]}}
+        else:
+            return {"data": {"users": []}}
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    monkeypatch.setattr(admin, "API_MAX_LIMIT", 1)
+
+    args = make_args(group="g", query=None)
+    out = stdout_of(admin.cmd_admin_groups_memberships, args)
+    assert out.index("u1@example.com") < out.index("u2@example.com")
+    # Later pages are prefetched concurrently, so they may arrive in any order.
+    assert offsets[0] == 0
+    assert sorted(offsets)[:3] == [0, 1, 2]
+
+
+def test_fetch_memberships_uses_total(admin, monkeypatch):
+    users = [{"id": str(i)} for i in range(5)]
+    offsets = []
+
+    def fake_http_json(method, url, token, payload):
+        offset = payload["offset"]
+        offsets.append(offset)
+        return {"data": {"users": users[offset:offset + 2]}, "pagination": {"total": len(users)}}
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    monkeypatch.setattr(admin, "API_MAX_LIMIT", 2)
+    assert admin._fetch_memberships("base", "token", "/groups.memberships", {}, "users") == users
+    # No page past the total is requested.
+    assert sorted(offsets) == [0, 2, 4]
+
+
+def test_fetch_memberships_stops_when_offset_is_ignored(admin, monkeypatch):
+    page = [{"id": "1"}, {"id": "2"}]
+    monkeypatch.setattr(admin, "http_json", lambda method, url, token, payload: {"data": {"users": page}})
+    monkeypatch.setattr(admin, "API_MAX_LIMIT", 2)
+    assert admin._fetch_memberships("base", "token", "/groups.memberships", {}, "users") == page
+
+
+def test_admin_groups_list_handles_strings(admin, monkeypatch, stdout_of, make_args):
+    monkeypatch.setattr(
+        admin,
+        "_fetch_memberships",
+        lambda base, token, path, params, key: ["group1"],
+    )
+    out = stdout_of(admin.cmd_admin_groups_list, make_args())
+    assert "group1" in out
+
+
+def test_admin_groups_list_parses_nested_response(admin, monkeypatch, stdout_of, make_args):
+    def fake_http_json(method, url, token, payload):
+        return {"data": {"groups": [{"id": "g1", "name": "Group1", "memberCount": 2}], "groupMemberships": []}}
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    monkeypatch.setattr(admin, "API_MAX_LIMIT", 10)
+    out = stdout_of(admin.cmd_admin_groups_list, make_args())
+    assert "Group1" in out and "2" in out
+
+
+def test_admin_groups_create_multiple(admin, http_calls, make_args):
+    args = make_args(names=["g1", "g2"])
+    admin.cmd_admin_groups_create(args)
+    assert http_calls == [
+        ("base/groups.create", {"name": "g1"}),
+        ("base/groups.create", {"name": "g2"}),
+    ]
+
+
+def test_admin_groups_delete_reports_all_missing(admin, monkeypatch, capsys, make_args):
+    calls = []
+
+    def fake_resolve(base, token, ident):
+        if ident == "good":
+            return "gid1"
+        print(f"Group not found: {ident}", file=sys.stderr)
+        raise SystemExit(1)
+
+    def fake_http_json(method, url, token, payload):
+        calls.append(payload["id"])
+
+    monkeypatch.setattr(admin, "_resolve_group_id", fake_resolve)
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+
+    args = make_args(groups=["good", "bad1", "bad2"])
+    with pytest.raises(SystemExit):
+        admin.cmd_admin_groups_delete(args)
+    _, err = capsys.readouterr()
+    assert "Group not found: bad1" in err
+    assert "Group not found: bad2" in err
+    assert calls == ["gid1"]
+
+
+@pytest.mark.parametrize("status", [None, 401, 403])
+def test_admin_users_delete_stops_on_auth_or_network_failure(admin, monkeypatch, make_args, status):
+    calls = []
+
+    def fake_http_json(method, url, token, payload):
+        calls.append(payload["id"])
+        if len(calls) > 1:
+            time.sleep(0.01)  # leave time to cancel the queue
+        raise admin.ApiError("failed", status)
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    with pytest.raises(SystemExit) as exc:
+        uuids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(20)]
+        admin.cmd_admin_users_delete(make_args(users=uuids, workers=1))
+    assert exc.value.code == 2
+    assert len(calls) < 20
+
+
+def test_admin_bulk_commands_report_auth_failure_not_missing_ids(admin, monkeypatch, http_calls, make_args):
+    def fake_resolve(base, token, ident):
+        raise admin.ApiError("Authentication failed: Unauthorized", 401)
+
+    monkeypatch.setattr(admin, "_resolve_user_id", fake_resolve)
+    monkeypatch.setattr(admin, "_resolve_group_id", fake_resolve)
+    for handler, args in (
+        (admin.cmd_admin_users_delete, make_args(users=["a@example.com"])),
+        (admin.cmd_admin_groups_delete, make_args(groups=["team"])),
+    ):
+        with pytest.raises(SystemExit) as exc:
+            handler(args)
+        assert exc.value.code == 2
+    assert http_calls == []
+
+
+def test_admin_delete_by_id_forgets_cached_names(admin, http_calls, monkeypatch, stdout_of, make_args):
+    import yonote_cli.core.cache as cache
+
+    uid = "123e4567-e89b-12d3-a456-426614174000"
+    cache.remember_ids("users", "base", {"a@example.com": uid, "b@example.com": "other"})
+    cache.remember_ids("groups", "base", {"team": "gid1"})
+
+    stdout_of(admin.cmd_admin_users_delete, make_args(users=[uid]))
+    assert cache.lookup_id("users", "base", "a@example.com") is None
+    assert cache.lookup_id("users", "base", "b@example.com") == "other"
+
+    monkeypatch.setattr(admin, "_resolve_group_id", lambda base, token, ident: "gid1")
+    stdout_of(admin.cmd_admin_groups_delete, make_args(groups=["gid-alias"]))
+    assert cache.lookup_id("groups", "base", "team") is None
+
+
+def test_admin_groups_create_replaces_cached_id(admin, monkeypatch, stdout_of, make_args):
+    import yonote_cli.core.cache as cache
+
+    # "team" was deleted and recreated elsewhere; the cache still has its old id.
+    cache.remember_ids("groups", "base", {"team": "old", "old-alias": "old"})
+    monkeypatch.setattr(admin, "lookup_id", cache.lookup_id)
+    monkeypatch.setattr(
+        admin, "http_json", lambda method, url, token, payload: {"data": {"id": "new", "name": payload["name"]}}
+    )
+
+    stdout_of(admin.cmd_admin_groups_create, make_args(names=["team"]))
+    assert cache.lookup_id("groups", "base", "team") == "new"
+    assert cache.lookup_id("groups", "base", "old-alias") is None
+
+
+def test_admin_groups_delete_continues_after_failed_call(admin, monkeypatch, capsys, make_args):
+    def fake_http_json(method, url, token, payload):
+        if payload["id"] == "g1":
+            raise admin.ApiError("[HTTP 404] Not found", 404)
+
+    monkeypatch.setattr(admin, "http_json", fake_http_json)
+    with pytest.raises(SystemExit) as exc:
+        admin.cmd_admin_groups_delete(make_args(groups=["g1", "g2", "g1"]))
+    assert exc.value.code == 1
+    assert capsys.readouterr().out == "delete g2\n"
+
+
+def test_admin_groups_add_user_adds_every_user(admin, http_calls, stdout_of, make_args):
+    args = make_args(group="g", users=["u1", "u2", "u1"])
+    out = stdout_of(admin.cmd_admin_groups_add_user, args)
+    assert sorted(http_calls, key=str) == [
+        ("base/groups.add_user", {"id": "g", "userId": "u1"}),
+        ("base/groups.add_user", {"id": "g", "userId": "u2"}),
+    ]
+    assert out == "added u1 to g\nadded u2 to g\n"
+
+
+def test_admin_collections_remove_user_reports_unknown_user(admin, http_calls, monkeypatch, capsys, make_args):
+    def fake_resolve(base, token, ident):
+        if ident == "gone":
+            raise SystemExit(1)
+        return ident + "_id"
+
+    monkeypatch.setattr(admin, "_resolve_user_id", fake_resolve)
+    with pytest.raises(SystemExit) as exc:
+        admin.cmd_admin_collections_remove_user(make_args(collection="c1", users=["gone", "u2"]))
+    assert exc.value.code == 1
+    assert http_calls == [("base/collections.remove_user", {"id": "c1", "userId": "u2_id"})]
+    assert capsys.readouterr().out == "removed u2 from c1\n"
+
+
+def test_admin_collections_list(admin, monkeypatch, stdout_of, make_args):
+    monkeypatch.setattr(
+        admin,
+        "fetch_all_concurrent",
+        lambda base, token, path, params=None, desc=None: [
+            {"id": "c1", "name": "Col1", "private": False}
+        ],
+    )
+    out = stdout_of(admin.cmd_admin_collections_list, make_args())
+    assert "Col1" in out
+
+
+def test_resolve_user_id_uses_id_cache(monkeypatch):
+    # Imported directly rather than through the ``admin`` fixture so the real
+    # resolver is used instead of the autouse stub.
+    import yonote_cli.commands.admin as admin_module
+    import yonote_cli.core.cache as cache
+
+    lookups = []
+
+    def fake_http_json(method, url, token, payload):
+        lookups.append(payload["query"])
+        return {
+            "data": [
+                {"id": "uid1", "email": "a@example.com"},
+                {"id": "uid2", "email": "ab@example.com"},
+            ]
+        }
+
+    monkeypatch.setattr(admin_module, "http_json", fake_http_json)
+    assert admin_module._resolve_user_id("base", "token", "a@example.com") == "uid1"
+    assert admin_module._resolve_user_id("base", "token", "A@example.com") == "uid1"
+    # Other users returned by the same search are remembered too.
+    assert admin_module._resolve_user_id("base", "token", "ab@example.com") == "uid2"
+    assert lookups == ["a@example.com"]
+
+    # A new process reads the ids back from the cache file.
+    cache.flush_ids()
+    monkeypatch.setattr(cache, "_ids", None)
+    assert admin_module._resolve_user_id("base", "token", "a@example.com") == "uid1"
+    assert lookups == ["a@example.com"]
+
+
+def test_resolve_group_id_lists_groups_once_per_process(monkeypatch, capsys):
+    import yonote_cli.commands.admin as admin_module
+
+    listings = []
+
+    def fake_fetch(base, token, path, params, key):
+        listings.append(path)
+        return [{"id": "gid1", "name": "team"}]
+
+    monkeypatch.setattr(admin_module, "_group_listing", {})
+    monkeypatch.setattr(admin_module, "lookup_id", lambda kind, base, ident: None)
+    monkeypatch.setattr(admin_module, "remember_ids", lambda kind, base, ids: None)
+    monkeypatch.setattr(admin_module, "_fetch_memberships", fake_fetch)
+    for ident in ("missing1", "missing2"):
+        with pytest.raises(SystemExit):
+            admin_module._resolve_group_id("base", "token", ident)
+    assert admin_module._resolve_group_id("base", "token", "team") == "gid1"
+    assert listings == ["/groups.list"]
+    assert "Group not found: missing2" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("123e4567-e89b-12d3-a456-426614174000", True),
+        ("123E4567-E89B-12D3-A456-426614174000", True),
+        ("123e4567e89b12d3a456426614174000", False),
+        ("123e4567-e89b-12d3-a456-42661417400z", False),
+        ("123e4567-e89b-12d3-a456-4266141740 0", False),
+        ("123e4567-e89b-12d3a-456-426614174000", False),
+        ("a@example.com", False),
+        ("", False),
+    ],
+)
+def test_is_uuid(admin, value, expected):
+    assert admin._is_uuid(value) is expected
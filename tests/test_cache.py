@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def cache():
+    import yonote_cli.core.cache as module
+
+    return module
+
+
+def test_load_cache_reuses_parsed_file_until_it_changes(cache, monkeypatch):
+    reads = []
+    real_loads = cache._loads
+    monkeypatch.setattr(cache, "_loads", lambda raw: reads.append(raw) or real_loads(raw))
+
+    cache.CACHE_PATH.write_text(json.dumps({"collections": [{"id": "c1"}]}))
+    first = cache.load_cache()
+    first["scratch"] = True  # callers get their own top-level dict
+    assert cache.load_cache() == {"collections": [{"id": "c1"}]}
+    assert len(reads) == 1
+
+    cache.save_cache({"collections": []})
+    assert cache.load_cache() == {"collections": []}
+    assert len(reads) == 2
+    cache.CACHE_PATH.unlink()
+    assert cache.load_cache() == {}
+
+
+def test_refresh_document_branch_replaces_subtree(cache, monkeypatch):
+    docs = [
+        {"id": "a"},
+        {"id": "b", "parentDocumentId": "a"},
+        {"id": "c", "parentDocumentId": "b"},
+        {"id": "d", "parentDocumentId": "d"},  # self-parented, left alone
+        {"id": "e"},
+    ]
+    cache.save_cache({"collection:c1": docs})
+    fresh = [{"id": "b2", "parentDocumentId": "a"}]
+    monkeypatch.setattr(cache, "fetch_all_concurrent", lambda *a, **kw: fresh)
+
+    result = cache.refresh_document_branch("base", "token", "c1", "a", workers=1)
+    assert [d["id"] for d in result] == ["a", "d", "e", "b2"]
+    assert cache.load_cache()["collection:c1"] == result
+
+
+def test_cache_info_lists_keys(tmp_path, monkeypatch, stdout_of):
+    import yonote_cli.commands.cache as command
+
+    path = tmp_path / "cache.json"
+    monkeypatch.setattr(command, "CACHE_PATH", path)
+    assert stdout_of(command.cache_info, None) == f"No cache file at: {path}\n"
+
+    path.write_text(json.dumps({f"collection:{i}": [] for i in range(7)}))
+    out = stdout_of(command.cache_info, None).splitlines()
+    assert out[1:] == ["Keys: 7", "Sample keys: " + ", ".join(f"collection:{i}" for i in range(5))]
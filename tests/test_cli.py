@@ -1,284 +1,141 @@
-import subprocess
-import os
 import json
-from types import SimpleNamespace
+import subprocess
 import sys
 from pathlib import Path
-import pytest
-
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "yonote_cli"))
-import yonote_cli.commands.admin as admin
-
-def test_cli_help():
-    result = subprocess.run([
-        "python", "-m", "yonote_cli.yonote_cli", "--help"
-    ], capture_output=True, text=True)
-    assert result.returncode == 0
-    usage = result.stdout.splitlines()[0]
-    assert "{auth,cache,export,import,admin}" in usage
-
-
-def test_admin_users_help():
-    result = subprocess.run([
-        "python", "-m", "yonote_cli.yonote_cli", "admin", "users", "--help"
-    ], capture_output=True, text=True)
-    assert result.returncode == 0
-    assert "update" in result.stdout
-    assert "add" in result.stdout
-    assert "promote" not in result.stdout
-
-    upd_help = subprocess.run([
-        "python", "-m", "yonote_cli.yonote_cli", "admin", "users", "update", "--help"
-    ], capture_output=True, text=True)
-    assert "--promote" in upd_help.stdout
-    assert "--name" not in upd_help.stdout
-    assert "--avatar-url" not in upd_help.stdout
-
-
-def test_auth_help():
-    result = subprocess.run([
-        "python", "-m", "yonote_cli.yonote_cli", "auth", "--help"
-    ], capture_output=True, text=True)
-    assert result.returncode == 0
-    assert "Save base URL" in result.stdout
-
-
-def test_auth_set(tmp_path):
-    env = {**os.environ, "HOME": str(tmp_path)}
-    result = subprocess.run([
-        "python", "-m", "yonote_cli.yonote_cli", "auth", "set",
-        "--base-url", "https://example.com/api", "--token", "secret"
-    ], capture_output=True, text=True, env=env)
-    assert result.returncode == 0
-    cfg = json.loads((tmp_path / ".yonote.json").read_text())
-    assert cfg["base_url"] == "https://example.com/api"
-    assert cfg["token"] == "secret"
-
-
-def test_admin_users_list_pagination(monkeypatch, capsys):
-    captured = {}
-
-    def fake_fetch_all(base, token, path, *, params=None, **_):
-        captured["params"] = params
-        return [
-            {"id": "1", "email": "a@example.com", "name": "A", "isAdmin": False, "isSuspended": False}
-        ]
-
-    monkeypatch.setattr(admin, "fetch_all_concurrent", fake_fetch_all)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-
-    args = SimpleNamespace(query=None)
-    admin.cmd_admin_users_list(args)
-    out, _ = capsys.readouterr()
-    assert "a@example.com" in out
-    assert captured["params"] == {"filter": "all"}
-
-
-def test_admin_users_list_query(monkeypatch):
-    captured = {}
-
-    def fake_fetch_all(base, token, path, *, params=None, **_):
-        captured["params"] = params
-        return []
-
-    monkeypatch.setattr(admin, "fetch_all_concurrent", fake_fetch_all)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-
-    args = SimpleNamespace(query="smith")
-    admin.cmd_admin_users_list(args)
-    assert captured["params"] == {"filter": "all", "query": "smith"}
-
-
-def test_admin_users_add(monkeypatch, capsys):
-    calls = []
-
-    def fake_http_json(method, url, token, payload):
-        calls.append((url, payload))
-        return {}
 
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-
-    args = SimpleNamespace(emails=["a@example.com", "b@example.com"])
-    admin.cmd_admin_users_add(args)
-    out, _ = capsys.readouterr()
-    assert "invited a@example.com" in out
-    assert calls == [
-        ("base/users.invite", {"emails": ["a@example.com"]}),
-        ("base/users.invite", {"emails": ["b@example.com"]}),
-    ]
-
-
-def test_admin_users_add_continues_on_error(monkeypatch, capsys):
-    calls = []
-
-    def fake_http_json(method, url, token, payload):
-        calls.append((url, payload))
-        if payload["emails"][0] == "b@example.com":
-            raise SystemExit(2)
-        return {}
-
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-
-    args = SimpleNamespace(emails=["a@example.com", "b@example.com", "c@example.com"])
-    admin.cmd_admin_users_add(args)
-    out, err = capsys.readouterr()
-    assert "invited a@example.com" in out
-    assert "invited c@example.com" in out
-    assert "failed b@example.com" in err
-    assert calls == [
-        ("base/users.invite", {"emails": ["a@example.com"]}),
-        ("base/users.invite", {"emails": ["b@example.com"]}),
-        ("base/users.invite", {"emails": ["c@example.com"]}),
-    ]
-
-
-def test_admin_users_delete_reports_all_missing(monkeypatch, capsys):
-    calls = []
-
-    def fake_resolve(base, token, ident):
-        if ident == "good@example.com":
-            return "uid1"
-        print(f"User not found: {ident}", file=sys.stderr)
-        raise SystemExit(1)
-
-    def fake_http_json(method, url, token, payload):
-        calls.append(payload["id"])
+import pytest
 
-    monkeypatch.setattr(admin, "_resolve_user_id", fake_resolve)
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
 
-    args = SimpleNamespace(users=["good@example.com", "bad1@example.com", "bad2@example.com"])
+@pytest.mark.parametrize(
+    "path, needle, present",
+    [
+        ((), "{auth,cache,export,import,admin}", True),
+        (("auth",), "Save base URL", True),
+        (("admin", "users"), "update", True),
+        (("admin", "users"), "add", True),
+        (("admin", "users"), "promote", False),
+        (("admin", "users", "update"), "--promote", True),
+        (("admin", "users", "update"), "--name", False),
+        (("admin", "users", "update"), "--avatar-url", False),
+    ],
+)
+def test_help_text(cli_parser, capsys, path, needle, present):
+    with pytest.raises(SystemExit) as exc:
+        cli_parser.parse_args([*path, "--help"])
+    assert exc.value.code == 0
+    assert (needle in capsys.readouterr().out) is present
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["admin", "users", "list"], False),
+        (["admin", "--refresh-cache", "users", "list"], True),
+        (["admin", "users", "list", "--refresh-cache"], True),
+        (["admin", "groups", "delete", "g1", "--refresh-cache"], True),
+        (["admin", "collections", "add_group", "c1", "g1", "--refresh-cache"], True),
+    ],
+)
+def test_admin_refresh_cache_flag(cli_parser, argv, expected):
+    assert cli_parser.parse_args(argv).refresh_cache is expected
+
+
+def test_cli_without_command_prints_help(capsys):
+    from yonote_cli.__main__ import main as cli_main
+
+    assert cli_main([]) == 0
+    assert "Yonote CLI" in capsys.readouterr().out
+
+
+def test_root_help_skips_full_parser(monkeypatch, capsys):
+    import yonote_cli.__main__ as cli
+
+    monkeypatch.setattr(cli, "_get_parser", lambda: pytest.fail("full parser built"))
+    assert cli.main([]) == 0
     with pytest.raises(SystemExit):
-        admin.cmd_admin_users_delete(args)
-    _, err = capsys.readouterr()
-    assert "User not found: bad1@example.com" in err
-    assert "User not found: bad2@example.com" in err
-    assert calls == ["uid1"]
-
+        cli.main(["--help"])
+    assert "{auth,cache,export,import,admin}" in capsys.readouterr().out
 
-def test_admin_users_update_promote(monkeypatch):
-    calls = []
 
-    def fake_http_json(method, url, token, payload):
-        calls.append((url, payload))
-        return {"data": {}}
+def test_main_reuses_parser(monkeypatch, capsys):
+    import yonote_cli.__main__ as cli
 
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-    monkeypatch.setattr(admin, "_resolve_user_id", lambda base, token, ident: ident + "_id")
+    real_build = cli._build_parser
+    built = []
 
-    args = SimpleNamespace(users=["u1", "u2"],
-                           promote=True, demote=False, suspend=False, activate=False)
-    admin.cmd_admin_users_update(args)
-    assert calls == [
-        ("base/users.promote", {"id": "u1_id"}),
-        ("base/users.promote", {"id": "u2_id"}),
-    ]
+    def counting_build(fill=()):
+        built.append(tuple(fill))
+        return real_build(fill)
 
+    monkeypatch.setattr(cli, "_build_parser", counting_build)
+    cli._get_parser.cache_clear()
+    try:
+        cli.main(["cache"])
+        cli.main(["cache"])
+    finally:
+        cli._get_parser.cache_clear()
+    # Only the selected command's subtree is built, and only once.
+    assert built == [("cache",)]
 
-def test_admin_groups_memberships_paginates(monkeypatch, capsys):
-    offsets = []
 
-    def fake_http_json(method, url, token, payload):
-        offsets.append(payload["offset"])
-        if payload["offset"] == 0:
-            return {"data": {"users": [{"id": "1", "email": "u1@example.com", "name": "U1"}]}}
-        elif payload["offset"] == 1:
-            return {"data": {"users": [{"id": "2", "email": "u2@example.com", "name": "U2"}]}}
-        else:
-            return {"data": {"users": []}}
+def test_commands_resolve_lazily():
+    import yonote_cli.commands as commands
 
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "_resolve_group_id", lambda base, token, ident: ident)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-    monkeypatch.setattr(admin, "API_MAX_LIMIT", 1)
+    for name in commands.__all__:
+        assert callable(getattr(commands, name)), name
+    with pytest.raises(AttributeError):
+        commands.cmd_missing
 
-    args = SimpleNamespace(group="g", query=None)
-    admin.cmd_admin_groups_memberships(args)
-    out, _ = capsys.readouterr()
-    assert "u2@example.com" in out
-    assert offsets[:2] == [0, 1]
 
-
-def test_admin_groups_list_handles_strings(monkeypatch, capsys):
-    monkeypatch.setattr(
-        admin,
-        "_fetch_memberships",
-        lambda base, token, path, params, key: ["group1"],
+def test_module_entry_point_help():
+    # The only test that spawns the interpreter: it covers ``python -m`` and
+    # the compatibility wrapper in the repository root.
+    result = subprocess.run(
+        [sys.executable, "-m", "yonote_cli.yonote_cli", "--help"],
+        capture_output=True,
+        close_fds=False,
+        cwd=Path(__file__).resolve().parents[1],
     )
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-    admin.cmd_admin_groups_list(SimpleNamespace())
-    out, _ = capsys.readouterr()
-    assert "group1" in out
-
-
-def test_admin_groups_list_parses_nested_response(monkeypatch, capsys):
-    def fake_http_json(method, url, token, payload):
-        return {"data": {"groups": [{"id": "g1", "name": "Group1", "memberCount": 2}], "groupMemberships": []}}
-
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-    monkeypatch.setattr(admin, "API_MAX_LIMIT", 10)
-    admin.cmd_admin_groups_list(SimpleNamespace())
-    out, _ = capsys.readouterr()
-    assert "Group1" in out and "2" in out
-
-
-def test_admin_groups_create_multiple(monkeypatch):
-    calls = []
-
-    def fake_http_json(method, url, token, payload):
-        calls.append((url, payload))
-        return {"data": {"id": "gid"}}
-
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-
-    args = SimpleNamespace(names=["g1", "g2"])
-    admin.cmd_admin_groups_create(args)
-    assert calls == [
-        ("base/groups.create", {"name": "g1"}),
-        ("base/groups.create", {"name": "g2"}),
-    ]
-
-
-def test_admin_groups_delete_reports_all_missing(monkeypatch, capsys):
-    calls = []
-
-    def fake_resolve(base, token, ident):
-        if ident == "good":
-            return "gid1"
-        print(f"Group not found: {ident}", file=sys.stderr)
-        raise SystemExit(1)
-
-    def fake_http_json(method, url, token, payload):
-        calls.append(payload["id"])
-
-    monkeypatch.setattr(admin, "_resolve_group_id", fake_resolve)
-    monkeypatch.setattr(admin, "http_json", fake_http_json)
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
+    assert result.returncode == 0
+    assert b"Yonote CLI" in result.stdout
 
-    args = SimpleNamespace(groups=["good", "bad1", "bad2"])
-    with pytest.raises(SystemExit):
-        admin.cmd_admin_groups_delete(args)
-    _, err = capsys.readouterr()
-    assert "Group not found: bad1" in err
-    assert "Group not found: bad2" in err
-    assert calls == ["gid1"]
 
+def test_auth_set(tmp_path, monkeypatch):
+    import yonote_cli.core.config as config
+    from yonote_cli.__main__ import main as cli_main
 
-def test_admin_collections_list(monkeypatch, capsys):
-    monkeypatch.setattr(
-        admin,
-        "fetch_all_concurrent",
-        lambda base, token, path, params=None, desc=None: [
-            {"id": "c1", "name": "Col1", "private": False}
-        ],
-    )
-    monkeypatch.setattr(admin, "get_base_and_token", lambda: ("base", "token"))
-    admin.cmd_admin_collections_list(SimpleNamespace())
-    out, _ = capsys.readouterr()
-    assert "Col1" in out
+    monkeypatch.setattr(config, "CONFIG_PATH", tmp_path / ".yonote.json")
+    cli_main(["auth", "set", "--base-url", "https://example.com/api", "--token", "secret"])
+    cfg = json.loads((tmp_path / ".yonote.json").read_text())
+    assert cfg["base_url"] == "https://example.com/api"
+    assert cfg["token"] == "secret"
+    # Saving the same values again leaves the file untouched.
+    mtime = (tmp_path / ".yonote.json").stat().st_mtime_ns
+    cli_main(["auth", "set", "--token", "secret"])
+    assert (tmp_path / ".yonote.json").stat().st_mtime_ns == mtime
+    assert [p.name for p in tmp_path.iterdir()] == [".yonote.json"]
+
+
+def test_auth_set_keeps_mode_and_survives_bind_mount(tmp_path, monkeypatch):
+    import errno
+    import stat
+
+    import yonote_cli.core.config as config
+    from yonote_cli.__main__ import main as cli_main
+
+    path = tmp_path / ".yonote.json"
+    monkeypatch.setattr(config, "CONFIG_PATH", path)
+    cli_main(["auth", "set", "--token", "one"])
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    path.chmod(0o640)
+    cli_main(["auth", "set", "--token", "two"])
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+    # A bind-mounted file cannot be renamed over; it is rewritten in place.
+    def busy(src, dst):
+        raise OSError(errno.EBUSY, "Device or resource busy")
+
+    monkeypatch.setattr(config.os, "replace", busy)
+    cli_main(["auth", "set", "--token", "three"])
+    assert json.loads(path.read_text())["token"] == "three"
+    assert [p.name for p in tmp_path.iterdir()] == [".yonote.json"]
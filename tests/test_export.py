@@ -0,0 +1,67 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def export(monkeypatch):
+    from yonote_cli.commands import export as module
+
+    docs = [{"id": f"d{i}", "title": f"Doc {i}", "collectionId": "c1"} for i in range(6)]
+    monkeypatch.setattr(module, "get_base_and_token", lambda: ("base", "token"))
+    monkeypatch.setattr(module, "interactive_browse_for_export", lambda *a, **kw: ([], ["c1"]))
+    monkeypatch.setattr(module, "list_collections", lambda *a, **kw: [{"id": "c1", "name": "Col"}])
+    monkeypatch.setattr(module, "list_documents_in_collection", lambda *a, **kw: docs)
+    return module
+
+
+def _args(tmp_path):
+    return SimpleNamespace(out_dir=str(tmp_path), workers=1, refresh_cache=False, use_ids=False)
+
+
+def test_export_counts_missing_document_and_goes_on(export, monkeypatch, tmp_path, capsys):
+    def fake_export(base, token, doc_id, dest):
+        if doc_id == "d3":
+            raise export.ApiError("[HTTP 404] Not found", 404)
+        dest.write_text(doc_id)
+
+    monkeypatch.setattr(export, "export_document_to_file", fake_export)
+    export.cmd_export(_args(tmp_path))
+    out = capsys.readouterr().out
+    assert "Exported 5/6 documents" in out
+    assert "d3: [HTTP 404] Not found" in out
+
+
+def test_export_stops_on_rejected_token(export, monkeypatch, tmp_path):
+    calls = []
+
+    def fake_export(base, token, doc_id, dest):
+        calls.append(doc_id)
+        if len(calls) > 1:
+            time.sleep(0.05)  # leave time to cancel the queue
+        raise export.ApiError("Authentication failed: Unauthorized", 401)
+
+    monkeypatch.setattr(export, "export_document_to_file", fake_export)
+    with pytest.raises(SystemExit) as exc:
+        export.cmd_export(_args(tmp_path))
+    assert exc.value.code == 2
+    assert len(calls) < 6
+
+
+def test_export_ignores_stale_cached_titles(export, monkeypatch, tmp_path):
+    import yonote_cli.core.cache as cache
+
+    # The cached listing predates a rename and a move of the selected document.
+    cache.save_cache({"collection:c1": [{"id": "d9", "title": "Old", "collectionId": "c1"}]})
+    fresh = {
+        "d9": {"id": "d9", "title": "New", "collectionId": "c1", "parentDocumentId": "p1"},
+        "p1": {"id": "p1", "title": "Parent", "collectionId": "c1"},
+    }
+    monkeypatch.setattr(export, "interactive_browse_for_export", lambda *a, **kw: (["d9"], []))
+    monkeypatch.setattr(export, "http_json", lambda method, url, token, payload: {"data": fresh[payload["id"]]})
+    monkeypatch.setattr(export, "fetch_all_concurrent", lambda *a, **kw: [])
+    monkeypatch.setattr(export, "export_document_to_file", lambda base, token, doc_id, dest: dest.write_text(doc_id))
+
+    export.cmd_export(_args(tmp_path))
+    assert (tmp_path / "Col" / "Parent" / "New.md").read_text() == "d9"
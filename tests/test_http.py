@@ -1,22 +1,187 @@
-import pathlib
-import sys
-import pytest
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import BytesIO
 from urllib.error import HTTPError
 
-sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "yonote_cli"))
-from yonote_cli.core.http import http_json
+import pytest
+
+_UNAUTHORIZED_BODY = b'{"ok":false,"error":"Unauthorized"}'
 
 
-def test_http_json_forbidden(monkeypatch, capsys):
+def _http_error(url, code, msg, body):
+    """Return an ``HTTPError`` whose response body reads as ``body``."""
+    return HTTPError(url, code, msg, None, BytesIO(body))
+
+
+def test_http_json_forbidden(http, monkeypatch, capsys):
     def fake_urlopen(req, timeout=60):
-        body = b'{"ok":false,"error":"Unauthorized"}'
-        raise HTTPError(req.full_url, 403, "Forbidden", None, BytesIO(body))
+        raise _http_error(req.full_url, 403, "Forbidden", _UNAUTHORIZED_BODY)
 
-    monkeypatch.setattr("yonote_cli.core.http.urlopen", fake_urlopen)
+    monkeypatch.setattr(http, "urlopen", fake_urlopen)
     with pytest.raises(SystemExit) as exc:
-        http_json("GET", "https://example/api", "token")
+        http.http_json("GET", "https://example/api", "token")
     assert exc.value.code == 2
     err = capsys.readouterr().err
     assert "Forbidden" in err
     assert "administrator" in err
+
+
+def test_http_json_retries_rate_limited_request(http, monkeypatch):
+    calls, delays = [], []
+
+    def fake_urlopen(req, timeout=60):
+        calls.append(req.full_url)
+        if len(calls) < 3:
+            raise HTTPError(req.full_url, 429, "Too Many Requests", {"Retry-After": "2"}, BytesIO(b""))
+        return http.addinfourl(
+            BytesIO(b'{"ok":true}'), {"Content-Type": "application/json"}, req.full_url, 200
+        )
+
+    monkeypatch.setattr(http, "urlopen", fake_urlopen)
+    monkeypatch.setattr(http.time, "sleep", delays.append)
+    assert http.http_json("POST", "https://example/api", "token", {}) == {"ok": True}
+    assert len(calls) == 3
+    assert delays == [2.0, 2.0]
+
+
+def test_http_json_gives_up_after_retries(http, monkeypatch, capsys):
+    def fake_urlopen(req, timeout=60):
+        raise _http_error(req.full_url, 503, "Service Unavailable", b"down")
+
+    delays = []
+    monkeypatch.setattr(http, "urlopen", fake_urlopen)
+    monkeypatch.setattr(http.time, "sleep", delays.append)
+    with pytest.raises(SystemExit):
+        http.http_json("POST", "https://example/api", "token", {})
+    assert delays == [0.3, 0.6, 1.2]
+    assert "[HTTP 503] down" in capsys.readouterr().err
+
+
+# POST path -> (status, Location) answered by the echo server.
+_REDIRECTS = {"/old": (303, "/new"), "/fileOperations.redirect": (302, "/file.md")}
+_EXPORTED = "# Экспорт\n".encode()
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """Echo the JSON body back along with the client port it arrived on."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.headers.get("Content-Type", "").startswith("multipart/"):
+            self._reply({"body": raw.decode()})
+            return
+        payload = json.loads(raw or b"null")
+        if self.path in _REDIRECTS:
+            self.send_response(_REDIRECTS[self.path][0])
+            self.send_header("Location", _REDIRECTS[self.path][1])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/documents.export":
+            self._reply({"data": {"fileOperation": {"id": "op1"}}})
+            return
+        self._reply({"payload": payload, "port": self.client_address[1]})
+
+    def do_GET(self):
+        if self.path == "/file.md":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/markdown")
+            self.send_header("Content-Length", str(len(_EXPORTED)))
+            self.end_headers()
+            self.wfile.write(_EXPORTED)
+            return
+        self._reply({"path": self.path, "port": self.client_address[1]})
+
+    def _reply(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def echo_server(monkeypatch):
+    monkeypatch.setenv("no_proxy", "*")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+    # Handler threads block on idle keep-alive connections; do not join them.
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_json_reuses_connection(http, echo_server):
+    replies = [http.http_json("POST", f"{echo_server}/x", "token", {"n": n}) for n in range(3)]
+    assert [r["payload"] for r in replies] == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert len({r["port"] for r in replies}) == 1
+
+
+def test_http_json_replaces_stale_pooled_connections(http, echo_server, monkeypatch):
+    import socket
+    from urllib.parse import urlsplit
+
+    # Idle connections the server has since closed: the peer end is gone.
+    stale = []
+    for _ in range(3):
+        ours, theirs = socket.socketpair()
+        theirs.close()
+        conn = http.HTTPConnection("127.0.0.1")
+        conn.sock = ours
+        stale.append(conn)
+    parts = urlsplit(echo_server)
+    monkeypatch.setattr(http, "_pool", {("http", parts.hostname, parts.port): stale})
+
+    data = http.http_json("POST", f"{echo_server}/x", "token", {"n": 1})
+    assert data["payload"] == {"n": 1}
+    assert all(conn.sock is None for conn in stale)
+
+
+def test_http_json_follows_redirect(http, echo_server):
+    data = http.http_json("POST", f"{echo_server}/old", "token", {"n": 1})
+    assert data["path"] == "/new"
+
+
+def test_export_document_follows_file_operation(echo_server):
+    from yonote_cli.core.utils import _export_document, ensure_bytes
+
+    assert _export_document(echo_server, "token", "d1", ensure_bytes) == _EXPORTED
+
+
+def test_export_document_to_file_streams_download(echo_server, tmp_path):
+    from yonote_cli.core.utils import export_document_to_file
+
+    dest = tmp_path / "doc.md"
+    dest.write_bytes(b"stale")
+    export_document_to_file(echo_server, "token", "d1", dest)
+    assert dest.read_bytes() == _EXPORTED
+    assert [p.name for p in tmp_path.iterdir()] == ["doc.md"]
+
+
+def test_http_multipart_post_streams_file(http, echo_server, tmp_path):
+    src = tmp_path / "doc.md"
+    src.write_text("# Title\n" * 1000, encoding="utf-8")
+    fields = {"collectionId": "c1", "file": ("doc.md", src, "text/markdown")}
+    data = http.http_multipart_post(f"{echo_server}/upload", "token", fields)
+    body = data["body"]
+    assert 'name="collectionId"\r\n\r\nc1\r\n' in body
+    assert 'filename="doc.md"\r\nContent-Type: text/markdown\r\n\r\n' + src.read_text() + "\r\n" in body
+    assert body.endswith("--\r\n")
+
+
+def test_reserve_connections_only_grows_pool(http, monkeypatch):
+    monkeypatch.setattr(http, "POOL_SIZE", 32)
+    http.reserve_connections(64)
+    assert http.POOL_SIZE == 64
+    http.reserve_connections(8)
+    assert http.POOL_SIZE == 64
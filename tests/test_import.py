@@ -0,0 +1,37 @@
+def test_count_md_files_matches_import_walk(tmp_path):
+    from yonote_cli.commands.import_cmd import _count_md_files
+
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "B.MD").write_text("b")
+    (tmp_path / "notes.txt").write_text("c")
+    (tmp_path / "sub" / "deep").mkdir(parents=True)
+    (tmp_path / "sub" / "c.md").write_text("c")
+    (tmp_path / "sub" / "deep" / "d.md").write_text("d")
+
+    assert _count_md_files(tmp_path) == 4
+
+
+def test_read_ahead_keeps_order_and_bounds_reads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from yonote_cli.commands import import_cmd
+
+    paths = []
+    for i in range(10):
+        paths.append(tmp_path / f"{i}.md")
+        paths[-1].write_text(f"doc {i}", encoding="utf-8")
+
+    submitted = []
+
+    class Recording(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(fn)
+            return super().submit(fn, *args, **kwargs)
+
+    with Recording(max_workers=2) as ex:
+        reads = import_cmd._read_ahead(paths, ex)
+        path, future = next(reads)
+        assert path == paths[0] and future.result() == "doc 0"
+        assert len(submitted) == import_cmd._READ_AHEAD + 1
+        rest = [(p, f.result()) for p, f in reads]
+    assert rest == [(p, f"doc {i}") for i, p in enumerate(paths)][1:]
@@ -0,0 +1,17 @@
+def test_build_breadcrumbs_memo_matches_plain_walk():
+    from yonote_cli.core.interactive import _build_breadcrumbs
+
+    docs = [
+        {"id": "c", "parentDocumentId": "b"},
+        {"id": "b", "title": "B", "parentDocumentId": "a"},
+        {"id": "a", "title": "A"},
+        {"id": "x", "title": "X", "parentDocumentId": "y"},
+        {"id": "y", "title": "Y", "parentDocumentId": "x"},
+        {"id": "m", "title": "M", "parentDocumentId": "missing"},
+    ]
+    by_id = {d["id"]: d for d in docs}
+    memo = {}
+    paths = [_build_breadcrumbs(d, by_id, memo) for d in docs]
+    assert paths == [_build_breadcrumbs(d, by_id) for d in docs]
+    assert paths[:3] == ["A / B / (untitled)", "A / B", "A"]
+    assert paths[3] == "X / Y / X"
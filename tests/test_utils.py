@@ -0,0 +1,137 @@
+import io
+import json
+import random
+import sys
+import time
+
+import pytest
+
+
+@pytest.fixture
+def utils():
+    import yonote_cli.core.utils as module
+
+    return module
+
+
+def test_fetch_all_concurrent_uses_total(utils, monkeypatch):
+    rows = [{"id": str(i)} for i in range(25)]
+    offsets = []
+
+    def fake_http_json(method, url, token, payload):
+        offset, limit = payload["offset"], payload["limit"]
+        offsets.append(offset)
+        time.sleep(random.random() / 100)  # finish out of order
+        return {"data": rows[offset:offset + limit], "pagination": {"total": len(rows)}}
+
+    monkeypatch.setattr(utils, "http_json", fake_http_json)
+    result = utils.fetch_all_concurrent("base", "token", "/x", limit=5, workers=4, desc=None)
+    assert result == rows
+    # The total is known after the first page, so no page past it is requested.
+    assert sorted(offsets) == [0, 5, 10, 15, 20]
+
+
+def test_fetch_all_concurrent_without_total_keeps_order(utils, monkeypatch):
+    rows = [{"id": str(i)} for i in range(23)]
+
+    def fake_http_json(method, url, token, payload):
+        offset, limit = payload["offset"], payload["limit"]
+        time.sleep(random.random() / 100)  # finish out of order
+        return {"data": rows[offset:offset + limit]}
+
+    monkeypatch.setattr(utils, "http_json", fake_http_json)
+    result = utils.fetch_all_concurrent("base", "token", "/x", limit=5, workers=2, desc=None)
+    assert result == rows
+
+
+def test_fetch_all_concurrent_drops_queued_pages_after_error(utils, monkeypatch):
+    offsets = []
+
+    def fake_http_json(method, url, token, payload):
+        offsets.append(payload["offset"])
+        if payload["offset"]:
+            raise utils.ApiError("[HTTP 401] bad token", 401)
+        return {"data": [{"id": "1"}], "pagination": {"total": 50}}
+
+    monkeypatch.setattr(utils, "http_json", fake_http_json)
+    with pytest.raises(SystemExit) as exc:
+        utils.fetch_all_concurrent("base", "token", "/x", limit=1, workers=1, desc=None)
+    assert exc.value.code == 2
+    assert len(offsets) < 5
+
+
+@pytest.mark.parametrize("pagination", [{"hasMore": False}, {"nextPath": None}])
+def test_fetch_all_concurrent_stops_at_last_page_hint(utils, monkeypatch, pagination):
+    offsets = []
+
+    def fake_http_json(method, url, token, payload):
+        offsets.append(payload["offset"])
+        return {"data": [{"id": "1"}, {"id": "2"}], "pagination": pagination}
+
+    monkeypatch.setattr(utils, "http_json", fake_http_json)
+    result = utils.fetch_all_concurrent("base", "token", "/x", limit=2, workers=4, desc=None)
+    assert result == [{"id": "1"}, {"id": "2"}]
+    assert offsets == [0]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (b"# raw", b"# raw"),
+        ("# тест", "# тест".encode()),
+        ({"type": "Buffer", "data": list(b"# buf")}, b"# buf"),
+        ({"data": "# nested"}, b"# nested"),
+    ],
+)
+def test_ensure_bytes(utils, value, expected):
+    assert utils.ensure_bytes(value) == expected
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"# Plain markdown\n", b'{"data": "# Plain markdown\\n"}'],
+)
+def test_export_document_to_file_plain_and_enveloped(utils, monkeypatch, tmp_path, body):
+    monkeypatch.setattr(utils, "http_json", lambda method, url, token, payload: body)
+    utils.export_document_to_file("base", "token", "d1", tmp_path / "doc.md")
+    assert (tmp_path / "doc.md").read_bytes() == b"# Plain markdown\n"
+
+
+class _Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_print_json_binary_and_text_stdout(utils, monkeypatch):
+    doc = {"name": "Тест", "ids": [1, 2]}
+
+    raw = io.BytesIO()
+    wrapper = io.TextIOWrapper(raw, encoding="utf-8")
+    wrapper.write("before\n")  # buffered text must come out first
+    monkeypatch.setattr(sys, "stdout", wrapper)
+    utils.print_json(doc)
+    wrapper.flush()
+    assert json.loads(raw.getvalue().decode()[len("before\n"):]) == doc
+
+    # Piped output is compact, a terminal gets the indented form.
+    text = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", text)
+    utils.print_json(doc)
+    assert text.getvalue() == '{"name":"Тест","ids":[1,2]}\n'
+
+    terminal = _Terminal()
+    monkeypatch.setattr(sys, "stdout", terminal)
+    utils.print_json(doc)
+    assert terminal.getvalue() == json.dumps(doc, ensure_ascii=False, indent=2) + "\n"
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ('a/b\\c:d*e?f"g<h>i|j', "a_b_c_d_e_f_g_h_i_j"),
+        ("  many \t\n spaces ", "many spaces"),
+        ("", "untitled"),
+    ],
+)
+def test_safe_name(utils, name, expected):
+    assert utils.safe_name(name) == expected
@@ -5,6 +5,8 @@ This repository's source layout keeps the actual CLI implementation in the
 When running directly from a source checkout, however, tests and ``python -m``
 expect ``yonote_cli`` to be importable as a top level package.  This module
 re-exports the inner package's public modules to provide that compatibility.
+Both packages load their contents on first access (PEP 562), so importing
+them here stays cheap.
 """
 
 from importlib import import_module as _import_module
@@ -15,11 +17,12 @@ _core = _import_module(".yonote_cli.core", __name__)
 _commands = _import_module(".yonote_cli.commands", __name__)
 
 __all__ = ["__version__", "core", "commands"]
-__version__ = getattr(_inner, "__version__", "0")
+__version__ = _inner.__version__
 core = _core
 commands = _commands
 
-# Expose submodules so ``import yonote_cli.commands`` works
+# Expose submodules so ``import yonote_cli.commands`` gives the same module
+# objects, and with them the same config, caches and connection pool.
 _sys.modules[__name__ + ".core"] = _core
 _sys.modules[__name__ + ".commands"] = _commands
 _sys.modules[__name__ + ".yonote_cli"] = _inner
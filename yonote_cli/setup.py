@@ -7,6 +7,7 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=["InquirerPy", "tqdm"],
+    extras_require={"speedups": ["orjson"]},
     entry_points={
         "console_scripts": [
             "yonote=yonote_cli.__main__:main",
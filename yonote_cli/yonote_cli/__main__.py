@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import importlib
 import os
 import sys
 
@@ -12,239 +14,283 @@ import sys
 # it and add this file's directory to ``sys.path`` before importing.
 try:  # pragma: no cover - exercised indirectly in tests
     from yonote_cli.core import DEFAULT_BASE
-    from yonote_cli.commands import (
-        cmd_auth_set,
-        cmd_auth_info,
-        cache_info,
-        cache_clear,
-        cmd_export,
-        cmd_import,
-        cmd_admin_users_list,
-        cmd_admin_users_info,
-        cmd_admin_users_add,
-        cmd_admin_users_update,
-        cmd_admin_users_delete,
-        cmd_admin_groups_list,
-        cmd_admin_groups_create,
-        cmd_admin_groups_update,
-        cmd_admin_groups_delete,
-        cmd_admin_groups_memberships,
-        cmd_admin_groups_add_user,
-        cmd_admin_groups_remove_user,
-        cmd_admin_collections_list,
-        cmd_admin_collections_add_user,
-        cmd_admin_collections_remove_user,
-        cmd_admin_collections_memberships,
-        cmd_admin_collections_add_group,
-        cmd_admin_collections_remove_group,
-        cmd_admin_collections_group_memberships,
-    )
+    _PACKAGE = "yonote_cli"
 except ModuleNotFoundError:  # pragma: no cover
     if __package__ in (None, ""):
         sys.path.append(os.path.dirname(__file__))
         __package__ = "yonote_cli"
     from .core import DEFAULT_BASE
-    from .commands import (
-        cmd_auth_set,
-        cmd_auth_info,
-        cache_info,
-        cache_clear,
-        cmd_export,
-        cmd_import,
-        cmd_admin_users_list,
-        cmd_admin_users_info,
-        cmd_admin_users_add,
-        cmd_admin_users_update,
-        cmd_admin_users_delete,
-        cmd_admin_groups_list,
-        cmd_admin_groups_create,
-        cmd_admin_groups_update,
-        cmd_admin_groups_delete,
-        cmd_admin_groups_memberships,
-        cmd_admin_groups_add_user,
-        cmd_admin_groups_remove_user,
-        cmd_admin_collections_list,
-        cmd_admin_collections_add_user,
-        cmd_admin_collections_remove_user,
-        cmd_admin_collections_memberships,
-        cmd_admin_collections_add_group,
-        cmd_admin_collections_remove_group,
-        cmd_admin_collections_group_memberships,
-    )
+    _PACKAGE = __package__
 
 
-def main(argv=None):
-    parser = argparse.ArgumentParser(prog="yonote", description="Yonote CLI")
-    sub = parser.add_subparsers(dest="cmd")
+def _lazy(name: str):
+    """Return a handler that imports ``commands`` only when it is dispatched.
+
+    Building the parser therefore stays cheap: ``yonote --help`` and argument
+    errors never load the command modules.  Commands with ``--workers`` get a
+    connection pool large enough for all of their threads.
+    """
+
+    def _call(args):
+        commands = importlib.import_module(f"{_PACKAGE}.commands")
+        workers = getattr(args, "workers", None)
+        if workers:
+            http = importlib.import_module(f"{_PACKAGE}.core.http")
+            http.reserve_connections(workers)
+        return getattr(commands, name)(args)
+
+    return _call
+
+
+def _help_for(parser: argparse.ArgumentParser):
+    """Return a handler printing ``parser`` help when no subcommand is given."""
+
+    def _show(_args):
+        parser.print_help()
+        return 0
+
+    return _show
 
-    # auth
-    p_auth = sub.add_parser("auth", help="Authentication")
-    sub_auth = p_auth.add_subparsers(dest="auth_cmd")
+
+def _add_pair_command(sub, name: str, help_text: str, handler: str, first: str, second: str, parents=()):
+    """Add subcommand ``name`` taking two positionals, e.g. ``group user``.
+
+    ``second`` may be ``users``: then it takes one or more users, processed
+    by up to ``--workers`` threads.
+    """
+    p = sub.add_parser(name, help=help_text, parents=list(parents))
+    p.add_argument(first)
+    if second == "users":
+        p.add_argument("users", nargs="+", help="User ids or emails")
+        p.add_argument("--workers", type=int, default=20, help="Parallel workers")
+    else:
+        p.add_argument(second)
+    p.set_defaults(func=_lazy(handler))
+    return p
+
+
+def _build_auth(p: argparse.ArgumentParser) -> None:
+    """Add the ``auth`` subcommands to ``p``."""
+    p.set_defaults(func=_help_for(p))
+    sub_auth = p.add_subparsers(dest="auth_cmd")
 
     p_auth_set = sub_auth.add_parser("set", help="Save base URL and token to ~/.yonote.json")
     p_auth_set.add_argument("--base-url", help=f"Base API URL (default: {DEFAULT_BASE})")
     p_auth_set.add_argument("--token", help="Bearer token (JWT)")
-    p_auth_set.set_defaults(func=cmd_auth_set)
+    p_auth_set.set_defaults(func=_lazy("cmd_auth_set"))
 
     p_auth_info = sub_auth.add_parser("info", help="Show auth info")
-    p_auth_info.set_defaults(func=cmd_auth_info)
+    p_auth_info.set_defaults(func=_lazy("cmd_auth_info"))
 
-    # cache utils
-    p_cache = sub.add_parser("cache", help="Cache utilities")
-    sub_cache = p_cache.add_subparsers(dest="cache_cmd")
+
+def _build_cache(p: argparse.ArgumentParser) -> None:
+    """Add the ``cache`` subcommands to ``p``."""
+    p.set_defaults(func=_help_for(p))
+    sub_cache = p.add_subparsers(dest="cache_cmd")
     p_cache_info = sub_cache.add_parser("info", help="Show cache location and summary")
-    p_cache_info.set_defaults(func=cache_info)
+    p_cache_info.set_defaults(func=_lazy("cache_info"))
     p_cache_clear = sub_cache.add_parser("clear", help="Delete cache file")
-    p_cache_clear.set_defaults(func=cache_clear)
-
-    # unified export
-    p_exp = sub.add_parser("export", help="Interactive export of documents/collections")
-    p_exp.add_argument("--out-dir", required=True, help="Output directory")
-    p_exp.add_argument("--workers", type=int, default=20, help="Parallel workers")
-    p_exp.add_argument("--use-ids", action="store_true", help="Name files by document/collection IDs instead of titles")
-    p_exp.add_argument("--refresh-cache", action="store_true", help="Ignore cache and refetch collections/documents")
-    p_exp.set_defaults(func=cmd_export)
-
-    # import
-    p_imp = sub.add_parser("import", help="Import Markdown files into Yonote")
-    p_imp.add_argument("--src-dir", required=True, help="Directory with .md files")
-    p_imp.add_argument("--workers", type=int, default=20, help="Parallel workers")
-    p_imp.add_argument("--refresh-cache", action="store_true", help="Ignore cache and refetch collections/documents")
-    p_imp.set_defaults(func=cmd_import)
-
-    # admin
-    p_admin = sub.add_parser("admin", help="Administrative operations")
-    sub_admin = p_admin.add_subparsers(dest="admin_cmd")
+    p_cache_clear.set_defaults(func=_lazy("cache_clear"))
+
+
+def _build_export(p: argparse.ArgumentParser) -> None:
+    """Add the ``export`` options to ``p``."""
+    p.add_argument("--out-dir", required=True, help="Output directory")
+    p.add_argument("--workers", type=int, default=20, help="Parallel workers")
+    p.add_argument("--use-ids", action="store_true", help="Name files by document/collection IDs instead of titles")
+    p.add_argument("--refresh-cache", action="store_true", help="Ignore cache and refetch collections/documents")
+    p.set_defaults(func=_lazy("cmd_export"))
+
+
+def _build_import(p: argparse.ArgumentParser) -> None:
+    """Add the ``import`` options to ``p``."""
+    p.add_argument("--src-dir", required=True, help="Directory with .md files")
+    p.add_argument("--workers", type=int, default=20, help="Parallel workers")
+    p.add_argument("--refresh-cache", action="store_true", help="Ignore cache and refetch collections/documents")
+    p.set_defaults(func=_lazy("cmd_import"))
+
+
+def _build_admin(p: argparse.ArgumentParser) -> None:
+    """Add the ``admin`` subcommands to ``p``."""
+    # Options shared by several admin subcommands
+    query_parent = argparse.ArgumentParser(add_help=False)
+    query_parent.add_argument("--query")
+    perm_parent = argparse.ArgumentParser(add_help=False)
+    perm_parent.add_argument("--permission", choices=["read", "read_write", "maintainer"])
+    users_parent = argparse.ArgumentParser(add_help=False)
+    users_parent.add_argument("users", nargs="+", help="User ids or emails")
+    users_parent.add_argument("--workers", type=int, default=20, help="Parallel workers")
+    # Accepted after any admin subcommand too; SUPPRESS keeps the subcommand
+    # from resetting a flag given as ``admin --refresh-cache ...``.
+    cache_parent = argparse.ArgumentParser(add_help=False)
+    cache_parent.add_argument(
+        "--refresh-cache", action="store_true", default=argparse.SUPPRESS, help="Ignore cached user and group ids"
+    )
+
+    p.set_defaults(func=_help_for(p))
+    p.add_argument(
+        "--refresh-cache", action="store_true", help="Ignore cached user and group ids"
+    )
+    sub_admin = p.add_subparsers(dest="admin_cmd")
 
     # admin users
     p_admin_users = sub_admin.add_parser("users", help="Manage users")
+    p_admin_users.set_defaults(func=_help_for(p_admin_users))
     sub_admin_users = p_admin_users.add_subparsers(dest="admin_users_cmd")
 
-    p_admin_users_list = sub_admin_users.add_parser("list", help="List users")
-    p_admin_users_list.add_argument("--query")
-    p_admin_users_list.set_defaults(func=cmd_admin_users_list)
+    p_admin_users_list = sub_admin_users.add_parser("list", help="List users", parents=[query_parent, cache_parent])
+    p_admin_users_list.set_defaults(func=_lazy("cmd_admin_users_list"))
 
-    p_admin_users_info = sub_admin_users.add_parser("info", help="Show user info")
+    p_admin_users_info = sub_admin_users.add_parser("info", help="Show user info", parents=[cache_parent])
     p_admin_users_info.add_argument("user", help="User id or email")
-    p_admin_users_info.set_defaults(func=cmd_admin_users_info)
+    p_admin_users_info.set_defaults(func=_lazy("cmd_admin_users_info"))
 
-    p_admin_users_add = sub_admin_users.add_parser("add", help="Invite users")
+    p_admin_users_add = sub_admin_users.add_parser("add", help="Invite users", parents=[cache_parent])
     p_admin_users_add.add_argument("emails", nargs="+", help="Email addresses")
-    p_admin_users_add.set_defaults(func=cmd_admin_users_add)
+    p_admin_users_add.set_defaults(func=_lazy("cmd_admin_users_add"))
 
-    p_admin_users_update = sub_admin_users.add_parser("update", help="Update users")
-    p_admin_users_update.add_argument("users", nargs="+", help="User ids or emails")
+    p_admin_users_update = sub_admin_users.add_parser(
+        "update", help="Update users", parents=[users_parent, cache_parent]
+    )
     g_admin = p_admin_users_update.add_mutually_exclusive_group()
     g_admin.add_argument("--promote", action="store_true", help="Promote to admin")
     g_admin.add_argument("--demote", action="store_true", help="Demote from admin")
     g_status = p_admin_users_update.add_mutually_exclusive_group()
     g_status.add_argument("--suspend", action="store_true", help="Suspend user")
     g_status.add_argument("--activate", action="store_true", help="Activate user")
-    p_admin_users_update.set_defaults(func=cmd_admin_users_update)
+    p_admin_users_update.set_defaults(func=_lazy("cmd_admin_users_update"))
 
-    p_admin_users_delete = sub_admin_users.add_parser("delete", help="Delete user(s)")
-    p_admin_users_delete.add_argument("users", nargs="+", help="User ids or emails")
-    p_admin_users_delete.set_defaults(func=cmd_admin_users_delete)
+    p_admin_users_delete = sub_admin_users.add_parser(
+        "delete", help="Delete user(s)", parents=[users_parent, cache_parent]
+    )
+    p_admin_users_delete.set_defaults(func=_lazy("cmd_admin_users_delete"))
 
     # admin groups
     p_admin_groups = sub_admin.add_parser("groups", help="Manage groups")
+    p_admin_groups.set_defaults(func=_help_for(p_admin_groups))
     sub_admin_groups = p_admin_groups.add_subparsers(dest="admin_groups_cmd")
 
-    p_ag_list = sub_admin_groups.add_parser("list", help="List groups")
-    p_ag_list.set_defaults(func=cmd_admin_groups_list)
+    p_ag_list = sub_admin_groups.add_parser("list", help="List groups", parents=[cache_parent])
+    p_ag_list.set_defaults(func=_lazy("cmd_admin_groups_list"))
 
-    p_ag_create = sub_admin_groups.add_parser("create", help="Create group(s)")
+    p_ag_create = sub_admin_groups.add_parser("create", help="Create group(s)", parents=[cache_parent])
     p_ag_create.add_argument("names", nargs="+", help="Group names")
-    p_ag_create.set_defaults(func=cmd_admin_groups_create)
+    p_ag_create.set_defaults(func=_lazy("cmd_admin_groups_create"))
 
-    p_ag_update = sub_admin_groups.add_parser("update", help="Update group")
+    p_ag_update = sub_admin_groups.add_parser("update", help="Update group", parents=[cache_parent])
     p_ag_update.add_argument("group", help="Group id or name")
     p_ag_update.add_argument("name")
-    p_ag_update.set_defaults(func=cmd_admin_groups_update)
+    p_ag_update.set_defaults(func=_lazy("cmd_admin_groups_update"))
 
-    p_ag_delete = sub_admin_groups.add_parser("delete", help="Delete group(s)")
+    p_ag_delete = sub_admin_groups.add_parser("delete", help="Delete group(s)", parents=[cache_parent])
     p_ag_delete.add_argument("groups", nargs="+", help="Group ids or names")
-    p_ag_delete.set_defaults(func=cmd_admin_groups_delete)
+    p_ag_delete.add_argument("--workers", type=int, default=20, help="Parallel workers")
+    p_ag_delete.set_defaults(func=_lazy("cmd_admin_groups_delete"))
 
-    p_ag_memberships = sub_admin_groups.add_parser("memberships", help="List group members")
+    p_ag_memberships = sub_admin_groups.add_parser(
+        "memberships", help="List group members", parents=[query_parent, cache_parent]
+    )
     p_ag_memberships.add_argument("group")
-    p_ag_memberships.add_argument("--query")
-    p_ag_memberships.set_defaults(func=cmd_admin_groups_memberships)
-
-    p_ag_add_user = sub_admin_groups.add_parser("add_user", help="Add user to group")
-    p_ag_add_user.add_argument("group")
-    p_ag_add_user.add_argument("user")
-    p_ag_add_user.set_defaults(func=cmd_admin_groups_add_user)
+    p_ag_memberships.set_defaults(func=_lazy("cmd_admin_groups_memberships"))
 
-    p_ag_remove_user = sub_admin_groups.add_parser("remove_user", help="Remove user from group")
-    p_ag_remove_user.add_argument("group")
-    p_ag_remove_user.add_argument("user")
-    p_ag_remove_user.set_defaults(func=cmd_admin_groups_remove_user)
+    for name, help_text, handler in (
+        ("add_user", "Add user(s) to group", "cmd_admin_groups_add_user"),
+        ("remove_user", "Remove user(s) from group", "cmd_admin_groups_remove_user"),
+    ):
+        _add_pair_command(sub_admin_groups, name, help_text, handler, "group", "users", [cache_parent])
 
     # admin collections
     p_admin_collections = sub_admin.add_parser("collections", help="Manage collection access")
+    p_admin_collections.set_defaults(func=_help_for(p_admin_collections))
     sub_admin_collections = p_admin_collections.add_subparsers(dest="admin_collections_cmd")
 
-    p_ac_list = sub_admin_collections.add_parser("list", help="List collections")
-    p_ac_list.set_defaults(func=cmd_admin_collections_list)
-
-    p_ac_add_user = sub_admin_collections.add_parser("add_user", help="Add user to collection")
-    p_ac_add_user.add_argument("collection")
-    p_ac_add_user.add_argument("user")
-    p_ac_add_user.set_defaults(func=cmd_admin_collections_add_user)
+    p_ac_list = sub_admin_collections.add_parser("list", help="List collections", parents=[cache_parent])
+    p_ac_list.set_defaults(func=_lazy("cmd_admin_collections_list"))
 
-    p_ac_remove_user = sub_admin_collections.add_parser("remove_user", help="Remove user from collection")
-    p_ac_remove_user.add_argument("collection")
-    p_ac_remove_user.add_argument("user")
-    p_ac_remove_user.set_defaults(func=cmd_admin_collections_remove_user)
+    for name, help_text, handler in (
+        ("add_user", "Add user(s) to collection", "cmd_admin_collections_add_user"),
+        ("remove_user", "Remove user(s) from collection", "cmd_admin_collections_remove_user"),
+    ):
+        _add_pair_command(sub_admin_collections, name, help_text, handler, "collection", "users", [cache_parent])
 
-    p_ac_memberships = sub_admin_collections.add_parser("memberships", help="List collection user memberships")
+    p_ac_memberships = sub_admin_collections.add_parser(
+        "memberships", help="List collection user memberships", parents=[query_parent, perm_parent, cache_parent]
+    )
     p_ac_memberships.add_argument("collection")
-    p_ac_memberships.add_argument("--query")
-    p_ac_memberships.add_argument("--permission", choices=["read", "read_write", "maintainer"])
-    p_ac_memberships.set_defaults(func=cmd_admin_collections_memberships)
-
-    p_ac_add_group = sub_admin_collections.add_parser("add_group", help="Add group to collection")
-    p_ac_add_group.add_argument("collection")
-    p_ac_add_group.add_argument("group")
-    p_ac_add_group.set_defaults(func=cmd_admin_collections_add_group)
+    p_ac_memberships.set_defaults(func=_lazy("cmd_admin_collections_memberships"))
 
-    p_ac_remove_group = sub_admin_collections.add_parser("remove_group", help="Remove group from collection")
-    p_ac_remove_group.add_argument("collection")
-    p_ac_remove_group.add_argument("group")
-    p_ac_remove_group.set_defaults(func=cmd_admin_collections_remove_group)
+    for name, help_text, handler in (
+        ("add_group", "Add group to collection", "cmd_admin_collections_add_group"),
+        ("remove_group", "Remove group from collection", "cmd_admin_collections_remove_group"),
+    ):
+        _add_pair_command(sub_admin_collections, name, help_text, handler, "collection", "group", [cache_parent])
 
     p_ac_group_memberships = sub_admin_collections.add_parser(
-        "group_memberships", help="List collection group memberships"
+        "group_memberships",
+        help="List collection group memberships",
+        parents=[query_parent, perm_parent, cache_parent],
     )
     p_ac_group_memberships.add_argument("collection")
-    p_ac_group_memberships.add_argument("--query")
-    p_ac_group_memberships.add_argument("--permission", choices=["read", "read_write", "maintainer"])
-    p_ac_group_memberships.set_defaults(func=cmd_admin_collections_group_memberships)
+    p_ac_group_memberships.set_defaults(func=_lazy("cmd_admin_collections_group_memberships"))
 
-    args = parser.parse_args(argv)
 
-    if not args.cmd:
-        parser.print_help()
-        return 0
-    if args.cmd == "auth" and not getattr(args, "auth_cmd", None):
-        p_auth.print_help()
-        return 0
-    if args.cmd == "cache" and not getattr(args, "cache_cmd", None):
-        p_cache.print_help()
-        return 0
-    if args.cmd == "admin" and not getattr(args, "admin_cmd", None):
-        p_admin.print_help()
-        return 0
-    if args.cmd == "admin" and args.admin_cmd == "users" and not getattr(args, "admin_users_cmd", None):
-        p_admin_users.print_help()
-        return 0
-    if args.cmd == "admin" and args.admin_cmd == "groups" and not getattr(args, "admin_groups_cmd", None):
-        p_admin_groups.print_help()
-        return 0
-    if args.cmd == "admin" and args.admin_cmd == "collections" and not getattr(args, "admin_collections_cmd", None):
-        p_admin_collections.print_help()
-        return 0
+# Top-level commands with their help and argument builders, in the order
+# ``yonote --help`` lists them.
+_COMMANDS = {
+    "auth": ("Authentication", _build_auth),
+    "cache": ("Cache utilities", _build_cache),
+    "export": ("Interactive export of documents/collections", _build_export),
+    "import": ("Import Markdown files into Yonote", _build_import),
+    "admin": ("Administrative operations", _build_admin),
+}
+
+# Invocations that only need the top-level help.
+_ROOT_HELP_ARGV = ([], ["-h"], ["--help"])
+
+
+def _build_parser(fill=()) -> argparse.ArgumentParser:
+    """Return the root parser listing every command.
+
+    Only the commands named in ``fill`` get their arguments and subcommands;
+    the others are bare entries, which is enough for the top-level help and
+    for parsing an ``argv`` that selects another command.
+    """
+    parser = argparse.ArgumentParser(prog="yonote", description="Yonote CLI")
+    parser.set_defaults(func=_help_for(parser))
+    sub = parser.add_subparsers(dest="cmd")
+    for name, (help_text, build) in _COMMANDS.items():
+        p = sub.add_parser(name, help=help_text)
+        if name in fill:
+            build(p)
+    return parser
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Construct the full ``yonote`` argument parser."""
+    return _build_parser(_COMMANDS)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """Return the parser for an ``argv`` selecting ``command``.
+
+    Only that command's subtree is built; ``None`` builds all of them.
+    Parsers are shared by all ``main`` calls in this process: ``parse_args``
+    never mutates them, so reuse is safe for tests and other hosts that call
+    ``main`` repeatedly.
+    """
+    return build_parser() if command is None else _build_parser((command,))
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv in _ROOT_HELP_ARGV:
+        # Top-level help does not need any command subtree.
+        parser = _build_parser()
+    else:
+        parser = _get_parser(argv[0] if argv[0] in _COMMANDS else None)
+    args = parser.parse_args(argv)
     return args.func(args)
 
 
@@ -1,55 +1,53 @@
-"""Command handlers for yonote CLI."""
-
-from .auth import cmd_auth_set, cmd_auth_info
-from .cache import cache_info, cache_clear
-from .export import cmd_export
-from .import_cmd import cmd_import
-from .admin import (
-    cmd_admin_users_list,
-    cmd_admin_users_info,
-    cmd_admin_users_add,
-    cmd_admin_users_update,
-    cmd_admin_users_delete,
-    cmd_admin_groups_list,
-    cmd_admin_groups_create,
-    cmd_admin_groups_update,
-    cmd_admin_groups_delete,
-    cmd_admin_groups_memberships,
-    cmd_admin_groups_add_user,
-    cmd_admin_groups_remove_user,
-    cmd_admin_collections_list,
-    cmd_admin_collections_add_user,
-    cmd_admin_collections_remove_user,
-    cmd_admin_collections_memberships,
-    cmd_admin_collections_add_group,
-    cmd_admin_collections_remove_group,
-    cmd_admin_collections_group_memberships,
-)
-
-__all__ = [
-    "cmd_auth_set",
-    "cmd_auth_info",
-    "cache_info",
-    "cache_clear",
-    "cmd_export",
-    "cmd_import",
-    "cmd_admin_users_list",
-    "cmd_admin_users_info",
-    "cmd_admin_users_add",
-    "cmd_admin_users_update",
-    "cmd_admin_users_delete",
-    "cmd_admin_groups_list",
-    "cmd_admin_groups_create",
-    "cmd_admin_groups_update",
-    "cmd_admin_groups_delete",
-    "cmd_admin_groups_memberships",
-    "cmd_admin_groups_add_user",
-    "cmd_admin_groups_remove_user",
-    "cmd_admin_collections_list",
-    "cmd_admin_collections_add_user",
-    "cmd_admin_collections_remove_user",
-    "cmd_admin_collections_memberships",
-    "cmd_admin_collections_add_group",
-    "cmd_admin_collections_remove_group",
-    "cmd_admin_collections_group_memberships",
-]
+"""Command handlers for yonote CLI.
+
+Handlers are imported from their modules on first access, so dispatching
+e.g. ``yonote auth info`` does not load the admin, export and import
+modules.
+"""
+
+import importlib
+
+# Public name -> module defining it.
+_EXPORTS = {
+    "cmd_auth_set": "auth",
+    "cmd_auth_info": "auth",
+    "cache_info": "cache",
+    "cache_clear": "cache",
+    "cmd_export": "export",
+    "cmd_import": "import_cmd",
+    "cmd_admin_users_list": "admin",
+    "cmd_admin_users_info": "admin",
+    "cmd_admin_users_add": "admin",
+    "cmd_admin_users_update": "admin",
+    "cmd_admin_users_delete": "admin",
+    "cmd_admin_groups_list": "admin",
+    "cmd_admin_groups_create": "admin",
+    "cmd_admin_groups_update": "admin",
+    "cmd_admin_groups_delete": "admin",
+    "cmd_admin_groups_memberships": "admin",
+    "cmd_admin_groups_add_user": "admin",
+    "cmd_admin_groups_remove_user": "admin",
+    "cmd_admin_collections_list": "admin",
+    "cmd_admin_collections_add_user": "admin",
+    "cmd_admin_collections_remove_user": "admin",
+    "cmd_admin_collections_memberships": "admin",
+    "cmd_admin_collections_add_group": "admin",
+    "cmd_admin_collections_remove_group": "admin",
+    "cmd_admin_collections_group_memberships": "admin",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
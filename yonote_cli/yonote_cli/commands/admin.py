@@ -2,70 +2,252 @@
 
 from __future__ import annotations
 
-import json
-import re
+import itertools
 import sys
-from typing import Iterable, List, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from ..core import (
+    ApiError,
     fetch_all_concurrent,
     format_rows,
     get_base_and_token,
     http_json,
+    print_json,
 )
+from ..core.cache import clear_ids, forget_id, lookup_id, remember_ids
 from ..core.config import API_MAX_LIMIT
 
 
 # --- helpers ---------------------------------------------------------------
 
-_UUID_RE = re.compile(
-    r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
-)
-
-
 def _is_uuid(value: str) -> bool:
-    return bool(_UUID_RE.fullmatch(value))
+    # Emails and names fail the cheap length/hyphen test; the rest must be
+    # 32 hex digits.  ``fromhex`` skips spaces between byte pairs, so the
+    # decoded length is checked as well.
+    if len(value) != 36 or value.count("-") != 4:
+        return False
+    if value[8] != "-" or value[13] != "-" or value[18] != "-" or value[23] != "-":
+        return False
+    try:
+        return len(bytes.fromhex(value.replace("-", ""))) == 16
+    except ValueError:
+        return False
+
+
+def _connect(args) -> Tuple[str, str]:
+    """Return base URL and token, dropping cached ids on ``--refresh-cache``."""
+    if args.refresh_cache:
+        clear_ids()
+    return get_base_and_token()
 
 
 def _resolve_user_id(base: str, token: str, ident: str) -> str:
     if _is_uuid(ident):
         return ident
+    key = ident.lower()
+    cached = lookup_id("users", base, key)
+    if cached:
+        return cached
     data = http_json(
         "POST",
         f"{base}/users.list",
         token,
         {"limit": 100, "query": ident, "filter": "all"},
     )
-    for user in data.get("data", []):
-        if user.get("email", "").lower() == ident.lower():
-            return user["id"]
+    # Remember every user the search returned, not just the one asked for:
+    # batch commands often name several users matching the same query.
+    ids = {
+        user["email"].lower(): user["id"]
+        for user in data.get("data", [])
+        if user.get("email") and user.get("id")
+    }
+    remember_ids("users", base, ids)
+    if key in ids:
+        return ids[key]
     print(f"User not found: {ident}", file=sys.stderr)
     sys.exit(1)
 
 
+def _resolve_user_ids(base: str, token: str, idents: List[str], workers: int) -> List[Optional[str]]:
+    """Resolve each of ``idents`` like :func:`_resolve_user_id`.
+
+    Unknown users map to ``None``.  Names missing from the id cache are
+    searched for in parallel, unless there are more of them than one round of
+    ``workers`` searches covers: then the whole user list is fetched once and
+    only names it does not contain are searched for.
+    """
+    ids: dict = {}
+    missing = []
+    for ident in idents:
+        if _is_uuid(ident):
+            ids[ident] = ident
+            continue
+        cached = lookup_id("users", base, ident.lower())
+        if cached:
+            ids[ident] = cached
+        else:
+            missing.append(ident)
+
+    if len(missing) > workers:
+        users = fetch_all_concurrent(
+            base, token, "/users.list", params={"filter": "all"}, workers=workers, desc=None
+        )
+        by_email = {
+            user["email"].lower(): user["id"]
+            for user in users
+            if isinstance(user, dict) and user.get("email") and user.get("id")
+        }
+        remember_ids("users", base, by_email)
+        for ident in missing:
+            if ident.lower() in by_email:
+                ids[ident] = by_email[ident.lower()]
+        missing = [ident for ident in missing if ident not in ids]
+
+    def resolve(ident: str) -> Optional[str]:
+        return _try_resolve(_resolve_user_id, base, token, ident)
+
+    ids.update(zip(missing, _map_parallel(resolve, missing, workers)))
+    return [ids[ident] for ident in idents]
+
+
+# Group name -> id from the ``groups.list`` listing done by this process, per
+# base URL.  Names missing from it do not exist, so they are not listed again.
+_group_listing: Dict[str, Dict[str, str]] = {}
+
+
 def _resolve_group_id(base: str, token: str, ident: str) -> str:
     if _is_uuid(ident):
         return ident
-    groups = _fetch_memberships(base, token, "/groups.list", {}, "groups")
-    for group in groups:
-        if group.get("name") == ident:
-            return group["id"]
+    cached = lookup_id("groups", base, ident)
+    if cached:
+        return cached
+    ids = _group_listing.get(base)
+    if ids is None:
+        groups = _fetch_memberships(base, token, "/groups.list", {}, "groups")
+        # One listing resolves every group name, so remember all of them.
+        ids = {g["name"]: g["id"] for g in groups if isinstance(g, dict) and "name" in g and "id" in g}
+        _group_listing[base] = ids
+        remember_ids("groups", base, ids)
+    if ident in ids:
+        return ids[ident]
     print(f"Group not found: {ident}", file=sys.stderr)
     sys.exit(1)
 
 
-def _apply_user_action(path: str, idents: Iterable[str]) -> None:
-    base, token = get_base_and_token()
-    had_error = False
-    for ident in idents:
+def _try_resolve(resolver: Callable[[str, str, str], str], base: str, token: str, ident: str) -> Optional[str]:
+    """Return ``resolver(base, token, ident)``, or ``None`` if ``ident`` is unknown.
+
+    The miss has already been reported.  Auth and network failures are
+    raised: they are not about ``ident`` and would fail every other lookup.
+    """
+    try:
+        return resolver(base, token, ident)
+    except ApiError as e:
+        if e.fatal:
+            raise
+        return None
+    except SystemExit:
+        return None
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    """Return ``items`` without repeats, keeping the first occurrence's order."""
+    return list(dict.fromkeys(items))
+
+
+def _map_parallel(func: Callable, items: Iterable, workers: int) -> list:
+    """Return ``[func(item) for item in items]`` computed on ``workers`` threads.
+
+    Results keep the order of ``items`` so output stays deterministic.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
         try:
-            uid = _resolve_user_id(base, token, ident)
-        except SystemExit:
-            had_error = True
-            continue
-        http_json("POST", f"{base}/{path}", token, {"id": uid})
-        print(f"{path.split('.')[1]} {ident}")
-    if had_error:
+            return list(ex.map(func, items))
+        except BaseException:
+            # Do not send the queued calls once one has failed.
+            ex.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def _post_all(token: str, calls: List[Tuple[str, dict]], workers: int) -> List[bool]:
+    """POST each ``(url, payload)`` of ``calls`` in parallel.
+
+    Returns whether each call succeeded.  A call rejected for its item has
+    already printed its error and does not stop the others; an auth or
+    network failure (see :attr:`ApiError.fatal`) cancels the queued calls
+    and is raised.
+    """
+
+    def post(call: Tuple[str, dict]) -> bool:
+        try:
+            http_json("POST", call[0], token, call[1])
+        except ApiError as e:
+            if e.fatal:
+                raise
+            return False
+        return True
+
+    return _map_parallel(post, calls, workers)
+
+
+def _post_for_users(
+    base: str,
+    token: str,
+    url: str,
+    idents: List[str],
+    workers: int,
+    payload: Callable[[str], dict],
+) -> List[str]:
+    """Resolve ``idents`` and POST ``payload(user_id)`` to ``url`` for each.
+
+    Returns ``(ident, user_id)`` for the calls that succeeded, in order;
+    unknown users and failed calls have already printed their errors.
+    """
+    uids = _resolve_user_ids(base, token, idents, workers)
+    found = [(ident, uid) for ident, uid in zip(idents, uids) if uid is not None]
+    oks = _post_all(token, [(url, payload(uid)) for _ident, uid in found], workers)
+    return [pair for pair, ok in zip(found, oks) if ok]
+
+
+def _apply_user_action(args, path: str) -> None:
+    """Resolve ``args.users`` and POST each id to ``path``; exit 1 if any fails."""
+    base, token = _connect(args)
+    idents = _unique(args.users)
+    done = _post_for_users(
+        base, token, f"{base}/{path}", idents, args.workers, lambda uid: {"id": uid}
+    )
+    verb = path.split(".")[1]
+    for ident, uid in done:
+        if verb == "delete":
+            forget_id("users", base, uid)
+        print(f"{verb} {ident}")
+    if len(done) < len(idents):
+        sys.exit(1)
+
+
+def _apply_membership(
+    args, base: str, token: str, path: str, target: Tuple[str, str], message: str
+) -> None:
+    """POST each of ``args.users`` with the ``(id, label)`` ``target`` to ``path``.
+
+    ``message`` is formatted with each user that succeeded and the target's
+    label; exit 1 if any user is unknown or any call fails.
+    """
+    target_id, label = target
+    idents = _unique(args.users)
+    done = _post_for_users(
+        base,
+        token,
+        f"{base}/{path}",
+        idents,
+        args.workers,
+        lambda uid: {"id": target_id, "userId": uid},
+    )
+    for ident, _uid in done:
+        print(message.format(ident, label))
+    if len(done) < len(idents):
         sys.exit(1)
 
 
@@ -73,7 +255,7 @@ def _apply_user_action(path: str, idents: Iterable[str]) -> None:
 
 
 def cmd_admin_users_list(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     params: dict = {"filter": "all"}
     if args.query:
         params["query"] = args.query
@@ -88,31 +270,53 @@ def cmd_admin_users_list(args) -> None:
 
 
 def cmd_admin_users_info(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     uid = _resolve_user_id(base, token, args.user)
     data = http_json("POST", f"{base}/users.info", token, {"id": uid})
-    print(json.dumps(data.get("data"), ensure_ascii=False, indent=2))
+    print_json(data.get("data"))
+
+
+# Statuses of a request the server validated and refused without acting on.
+_INVALID_REQUEST = (400, 422)
 
 
 def cmd_admin_users_add(args) -> None:
     """Invite one or more users by email.
 
-    The API accepts a list of email addresses in the ``emails`` field.  We
-    send one request per address so that a failure for a single invite does not
-    prevent processing the remaining addresses.
+    The API accepts a list of email addresses in the ``emails`` field, so all
+    addresses are sent in one request.  If the server rejects that request as
+    invalid (400/422) we retry one address at a time so that a single bad
+    invite does not prevent processing the remaining addresses.  Any other
+    failure may have happened after some invites were sent, or would repeat
+    for every address, so it is raised instead.
     """
-    base, token = get_base_and_token()
-    for email in args.emails:
+    base, token = _connect(args)
+    url = f"{base}/users.invite"
+    emails = _unique(args.emails)
+    if len(emails) > 1:
+        try:
+            http_json("POST", url, token, {"emails": emails})
+        except ApiError as e:
+            if e.status not in _INVALID_REQUEST:
+                raise
+            print("batch invite failed, retrying one by one", file=sys.stderr)
+        else:
+            for email in emails:
+                print(f"invited {email}")
+            return
+    for email in emails:
         try:
-            http_json("POST", f"{base}/users.invite", token, {"emails": [email]})
+            http_json("POST", url, token, {"emails": [email]})
             print(f"invited {email}")
-        except SystemExit:
+        except ApiError as e:
+            if e.fatal:
+                raise
             # http_json already printed the error message
             print(f"failed {email}", file=sys.stderr)
 
 
 def cmd_admin_users_update(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     actions: List[Tuple[str, str]] = []
     if args.promote:
         actions.append(("users.promote", "promote"))
@@ -127,39 +331,58 @@ def cmd_admin_users_update(args) -> None:
         print("No update parameters provided", file=sys.stderr)
         sys.exit(1)
 
-    resolved = [
-        (ident, _resolve_user_id(base, token, ident)) for ident in args.users
-    ]
+    idents = _unique(args.users)
+    uids = _resolve_user_ids(base, token, idents, args.workers)
+    if None in uids:
+        sys.exit(1)
 
-    for path, verb in actions:
-        for ident, uid in resolved:
-            http_json("POST", f"{base}/{path}", token, {"id": uid})
+    # The actions come from separate exclusive groups and touch independent
+    # user flags, so every (action, user) call can run at once.
+    tasks = [
+        (f"{base}/{path}", verb, ident, uid)
+        for path, verb in actions
+        for ident, uid in zip(idents, uids)
+    ]
+    oks = _post_all(token, [(url, {"id": uid}) for url, _verb, _ident, uid in tasks], args.workers)
+    for (_url, verb, ident, _uid), ok in zip(tasks, oks):
+        if ok:
             print(f"{verb} {ident}")
+    if not all(oks):
+        sys.exit(1)
 
 
 def cmd_admin_users_delete(args) -> None:
-    _apply_user_action("users.delete", args.users)
+    _apply_user_action(args, "users.delete")
 
 
 # --- group commands -------------------------------------------------------
 
 
-def cmd_admin_groups_list(_args) -> None:
-    base, token = get_base_and_token()
+def cmd_admin_groups_list(args) -> None:
+    base, token = _connect(args)
     groups = _fetch_memberships(base, token, "/groups.list", {}, "groups")
     norm = [g if isinstance(g, dict) else {"name": g} for g in groups]
     format_rows(norm, ["id", "name", "memberCount"])
 
 
 def cmd_admin_groups_create(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     for name in args.names:
         data = http_json("POST", f"{base}/groups.create", token, {"name": name})
-        print(json.dumps(data.get("data"), ensure_ascii=False, indent=2))
+        # A cached id for this name belongs to a group deleted or renamed
+        # outside this CLI; cache the new group instead.
+        stale = lookup_id("groups", base, name)
+        if stale:
+            forget_id("groups", base, stale)
+        group = data.get("data")
+        if isinstance(group, dict) and group.get("id"):
+            remember_ids("groups", base, {name: group["id"]})
+        _group_listing.pop(base, None)
+        print_json(group)
 
 
 def cmd_admin_groups_update(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     gid = _resolve_group_id(base, token, args.group)
     data = http_json(
         "POST",
@@ -167,42 +390,97 @@ def cmd_admin_groups_update(args) -> None:
         token,
         {"id": gid, "name": args.name},
     )
-    print(json.dumps(data.get("data"), ensure_ascii=False, indent=2))
+    forget_id("groups", base, gid)
+    _group_listing.pop(base, None)
+    print_json(data.get("data"))
 
 
 def cmd_admin_groups_delete(args) -> None:
-    base, token = get_base_and_token()
-    had_error = False
-    for ident in args.groups:
-        try:
-            gid = _resolve_group_id(base, token, ident)
-        except SystemExit:
-            had_error = True
-            continue
-        http_json("POST", f"{base}/groups.delete", token, {"id": gid})
-        print(f"delete {ident}")
-    if had_error:
+    base, token = _connect(args)
+    url = f"{base}/groups.delete"
+    # Resolved one after another: the first name missing from the id cache
+    # lists every group, so the rest need no request, found or not.
+    idents = _unique(args.groups)
+    found: List[Tuple[str, str]] = []
+    for ident in idents:
+        gid = _try_resolve(_resolve_group_id, base, token, ident)
+        if gid is not None:
+            found.append((ident, gid))
+    oks = _post_all(token, [(url, {"id": gid}) for _ident, gid in found], args.workers)
+    _group_listing.pop(base, None)
+    for (ident, gid), ok in zip(found, oks):
+        if ok:
+            forget_id("groups", base, gid)
+            print(f"delete {ident}")
+    if len(found) < len(idents) or not all(oks):
         sys.exit(1)
 
 
+# Pages requested ahead of the one being consumed by ``_fetch_memberships``.
+_MEMBERSHIP_PREFETCH = 4
+# Threads fetching the remaining pages when the total is known.
+_MEMBERSHIP_WORKERS = 8
+
+
+def _page_start(items: list):
+    """Return the id of the first item of a page, if it has one."""
+    first = items[0] if items else None
+    return first.get("id") if isinstance(first, dict) else None
+
+
 def _fetch_memberships(base: str, token: str, path: str, params: dict, key: str):
-    """Fetch all paginated membership results for ``key``."""
-    results: list = []
-    offset = 0
-    while True:
-        payload = dict(params)
-        payload.update({"limit": API_MAX_LIMIT, "offset": offset})
-        data = http_json("POST", f"{base}{path}", token, payload)
-        items = (data.get("data") or {}).get(key, [])
-        results.extend(items)
-        if len(items) < API_MAX_LIMIT:
-            break
-        offset += API_MAX_LIMIT
+    """Fetch all paginated membership results for ``key``.
+
+    The first page is fetched on its own.  If it reports
+    ``pagination.total``, the remaining pages are all requested at once.
+    Otherwise later pages are requested ``_MEMBERSHIP_PREFETCH`` at a time
+    ahead of the one being consumed, so their latency overlaps; the first
+    short page, or a page starting with the item an earlier page started
+    with, ends the listing and anything requested past it is discarded.
+    """
+    url = f"{base}{path}"
+
+    def fetch_page(offset: int) -> dict:
+        return http_json("POST", url, token, {**params, "limit": API_MAX_LIMIT, "offset": offset})
+
+    def fetch(offset: int) -> list:
+        return (fetch_page(offset).get("data") or {}).get(key, [])
+
+    first = fetch_page(0)
+    results = (first.get("data") or {}).get(key, [])
+    if len(results) < API_MAX_LIMIT:
+        return results
+    total = (first.get("pagination") or {}).get("total")
+    if isinstance(total, int):
+        offsets = range(API_MAX_LIMIT, total, API_MAX_LIMIT)
+        for items in _map_parallel(fetch, offsets, _MEMBERSHIP_WORKERS):
+            results.extend(items)
+        return results
+    with ThreadPoolExecutor(max_workers=_MEMBERSHIP_PREFETCH) as ex:
+        offsets = itertools.count(API_MAX_LIMIT, API_MAX_LIMIT)
+        pending = deque(ex.submit(fetch, next(offsets)) for _ in range(_MEMBERSHIP_PREFETCH))
+        # First item of every page so far: a server ignoring ``offset`` would
+        # otherwise hand back the same full page forever.
+        starts = {_page_start(results)}
+        while pending:
+            items = pending.popleft().result()
+            start = _page_start(items)
+            if start is not None and start in starts:
+                for future in pending:
+                    future.cancel()
+                break
+            starts.add(start)
+            results.extend(items)
+            if len(items) < API_MAX_LIMIT:
+                for future in pending:
+                    future.cancel()
+                break
+            pending.append(ex.submit(fetch, next(offsets)))
     return results
 
 
 def cmd_admin_groups_memberships(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     gid = _resolve_group_id(base, token, args.group)
     params = {"id": gid}
     if args.query:
@@ -212,26 +490,22 @@ def cmd_admin_groups_memberships(args) -> None:
 
 
 def cmd_admin_groups_add_user(args) -> None:
-    base, token = get_base_and_token()
-    gid = _resolve_group_id(base, token, args.group)
-    uid = _resolve_user_id(base, token, args.user)
-    http_json("POST", f"{base}/groups.add_user", token, {"id": gid, "userId": uid})
-    print(f"added {args.user} to {args.group}")
+    base, token = _connect(args)
+    target = (_resolve_group_id(base, token, args.group), args.group)
+    _apply_membership(args, base, token, "groups.add_user", target, "added {} to {}")
 
 
 def cmd_admin_groups_remove_user(args) -> None:
-    base, token = get_base_and_token()
-    gid = _resolve_group_id(base, token, args.group)
-    uid = _resolve_user_id(base, token, args.user)
-    http_json("POST", f"{base}/groups.remove_user", token, {"id": gid, "userId": uid})
-    print(f"removed {args.user} from {args.group}")
+    base, token = _connect(args)
+    target = (_resolve_group_id(base, token, args.group), args.group)
+    _apply_membership(args, base, token, "groups.remove_user", target, "removed {} from {}")
 
 
 # --- collection commands --------------------------------------------------
 
 
-def cmd_admin_collections_list(_args) -> None:
-    base, token = get_base_and_token()
+def cmd_admin_collections_list(args) -> None:
+    base, token = _connect(args)
     cols = fetch_all_concurrent(
         base,
         token,
@@ -243,31 +517,19 @@ def cmd_admin_collections_list(_args) -> None:
 
 
 def cmd_admin_collections_add_user(args) -> None:
-    base, token = get_base_and_token()
-    uid = _resolve_user_id(base, token, args.user)
-    http_json(
-        "POST",
-        f"{base}/collections.add_user",
-        token,
-        {"id": args.collection, "userId": uid},
-    )
-    print(f"added {args.user} to {args.collection}")
+    base, token = _connect(args)
+    target = (args.collection, args.collection)
+    _apply_membership(args, base, token, "collections.add_user", target, "added {} to {}")
 
 
 def cmd_admin_collections_remove_user(args) -> None:
-    base, token = get_base_and_token()
-    uid = _resolve_user_id(base, token, args.user)
-    http_json(
-        "POST",
-        f"{base}/collections.remove_user",
-        token,
-        {"id": args.collection, "userId": uid},
-    )
-    print(f"removed {args.user} from {args.collection}")
+    base, token = _connect(args)
+    target = (args.collection, args.collection)
+    _apply_membership(args, base, token, "collections.remove_user", target, "removed {} from {}")
 
 
 def cmd_admin_collections_memberships(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     params = {"id": args.collection}
     if args.query:
         params["query"] = args.query
@@ -284,7 +546,7 @@ def cmd_admin_collections_memberships(args) -> None:
 
 
 def cmd_admin_collections_add_group(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     gid = _resolve_group_id(base, token, args.group)
     http_json(
         "POST",
@@ -296,7 +558,7 @@ def cmd_admin_collections_add_group(args) -> None:
 
 
 def cmd_admin_collections_remove_group(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     gid = _resolve_group_id(base, token, args.group)
     http_json(
         "POST",
@@ -308,7 +570,7 @@ def cmd_admin_collections_remove_group(args) -> None:
 
 
 def cmd_admin_collections_group_memberships(args) -> None:
-    base, token = get_base_and_token()
+    base, token = _connect(args)
     params = {"id": args.collection}
     if args.query:
         params["query"] = args.query
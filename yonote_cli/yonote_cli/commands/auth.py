@@ -2,8 +2,7 @@
 
 from __future__ import annotations
 
-from ..core import save_config, get_base_and_token, http_json
-import json  # used in cmd_auth_info to pretty print
+from ..core import save_config, get_base_and_token, http_json, print_json
 
 
 def cmd_auth_set(args):
@@ -13,4 +12,4 @@ def cmd_auth_set(args):
 def cmd_auth_info(_args):
     base, token = get_base_and_token()
     data = http_json("POST", f"{base}/auth.info", token, {})
-    print(json.dumps(data, ensure_ascii=False, indent=2))
+    print_json(data)
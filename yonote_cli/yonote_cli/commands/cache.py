@@ -2,24 +2,27 @@
 
 from __future__ import annotations
 
-import json
 from ..core import CACHE_PATH
+from ..core.http import _loads
 
 
 def cache_info(_args):
     p = CACHE_PATH
-    if p.exists():
-        print(f"Cache file: {p}  ({p.stat().st_size} bytes)")
-        try:
-            data = json.loads(p.read_text(encoding="utf-8"))
-            keys = list(data.keys())
-            print(f"Keys: {len(keys)}")
-            if keys:
-                print("Sample keys:", ", ".join(keys[:5]))
-        except Exception as e:
-            print(f"Cannot parse cache: {e}")
-    else:
+    try:
+        size = p.stat().st_size
+    except OSError:
         print(f"No cache file at: {p}")
+        return
+    print(f"Cache file: {p}  ({size} bytes)")
+    try:
+        # One binary read, parsed by orjson when it is installed.
+        data = _loads(p.read_bytes())
+        keys = list(data.keys())
+        print(f"Keys: {len(keys)}")
+        if keys:
+            print("Sample keys:", ", ".join(keys[:5]))
+    except Exception as e:
+        print(f"Cannot parse cache: {e}")
 
 
 def cache_clear(_args):
@@ -7,11 +7,12 @@ from typing import Dict, List, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ..core import (
+    ApiError,
     get_base_and_token,
     list_collections,
     list_documents_in_collection,
     interactive_browse_for_export,
-    export_document_content,
+    export_document_to_file,
     safe_name,
     tqdm,
     http_json,
@@ -32,8 +33,37 @@ def cmd_export(args):
         refresh_cache=args.refresh_cache,
     )
 
+    # Document info by id.  Only entries listed by this run go in: the
+    # cached listings the browser may have shown can be a day old, and stale
+    # titles or parents would put files in the wrong place.  Ids not listed
+    # here, e.g. ancestors of a selected document, cost a documents.info call.
     info_cache: Dict[str, dict] = {}
 
+    # include documents from selected collections
+    collections = list_collections(
+        base,
+        token,
+        use_cache=True,
+        refresh_cache=True,
+        workers=args.workers,
+    )
+    cols_by_id = {c.get("id"): c for c in collections}
+    all_ids: set[str] = set()
+    for cid in col_ids:
+        docs = list_documents_in_collection(
+            base,
+            token,
+            cid,
+            use_cache=True,
+            refresh_cache=True,
+            workers=args.workers,
+        )
+        for d in docs:
+            did = d.get("id")
+            if did:
+                all_ids.add(did)
+                info_cache.setdefault(did, d)
+
     def get_info(doc_id: str) -> dict:
         if doc_id not in info_cache:
             try:
@@ -78,35 +108,8 @@ def cmd_export(args):
                     stack.append(cid)
         return ids
 
-    expanded = set()
     for did in doc_ids:
-        expanded.update(gather_descendants(did))
-    doc_ids = list(expanded)
-
-    # include documents from selected collections
-    collections = list_collections(
-        base,
-        token,
-        use_cache=True,
-        refresh_cache=True,
-        workers=args.workers,
-    )
-    cols_by_id = {c.get("id"): c for c in collections}
-    all_ids = set(doc_ids)
-    for cid in col_ids:
-        docs = list_documents_in_collection(
-            base,
-            token,
-            cid,
-            use_cache=True,
-            refresh_cache=True,
-            workers=args.workers,
-        )
-        for d in docs:
-            did = d.get("id")
-            if did:
-                all_ids.add(did)
-                info_cache.setdefault(did, d)
+        all_ids.update(gather_descendants(did))
 
     if not all_ids:
         print("Ничего не выбрано для экспорта")
@@ -114,43 +117,60 @@ def cmd_export(args):
 
     ext = "md"
 
+    def segment(doc_id: str, info: dict) -> str:
+        if args.use_ids:
+            return doc_id
+        return safe_name(info.get("title") or "(без названия)")
+
+    # Directory segments of a document as a parent: its ancestors' segments
+    # followed by its own.  Siblings share their parents' entries, so every
+    # ancestor chain is walked once.
+    dir_segments: Dict[str, Tuple[str, ...]] = {}
+
     def build_path(doc_id: str) -> Path:
         info = get_info(doc_id)
-        if args.use_ids:
-            name = doc_id
-        else:
-            name = safe_name(info.get("title") or "(без названия)")
-        parts = [f"{name}.{ext}"]
+        chain: List[Tuple[str, dict]] = []  # ancestors, nearest first
+        prefix: Tuple[str, ...] = ()
         seen = {doc_id}
+        cyclic = False
         cur = info
         while True:
             pid = cur.get("parentDocumentId")
-            if not pid or pid in seen:
+            if not pid:
+                break
+            if pid in seen:
+                cyclic = True
+                break
+            if pid in dir_segments:
+                prefix = dir_segments[pid]
                 break
             seen.add(pid)
             parent = get_info(pid)
             if not parent:
                 break
-            if args.use_ids:
-                seg = pid
-            else:
-                seg = safe_name(parent.get("title") or "(без названия)")
-            parts.insert(0, seg)
+            chain.append((pid, parent))
             cur = parent
+        for pid, parent in reversed(chain):
+            prefix += (segment(pid, parent),)
+            # A chain cut short by a parent cycle depends on where it began.
+            if not cyclic:
+                dir_segments[pid] = prefix
         coll = cols_by_id.get(info.get("collectionId"), {})
         coll_name = info.get("collectionId") if args.use_ids else safe_name(
             coll.get("name") or "(без названия)"
         )
-        parts.insert(0, coll_name)
-        return out_dir.joinpath(*parts)
+        return out_dir.joinpath(coll_name, *prefix, f"{segment(doc_id, info)}.{ext}")
 
     def export_one(doc_id: str) -> Tuple[str, str | None]:
         try:
-            text = export_document_content(base, token, doc_id)
             path = build_path(doc_id)
             path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(text, encoding="utf-8")
+            export_document_to_file(base, token, doc_id, path)
             return (str(path), None)
+        except ApiError as e:
+            if e.fatal:
+                raise
+            return ("", str(e))
         except Exception as e:
             return ("", str(e))
 
@@ -162,7 +182,13 @@ def cmd_export(args):
             futures = {ex.submit(export_one, did): did for did in all_ids}
             for fut in as_completed(futures):
                 doc_id = futures[fut]
-                path, err = fut.result()
+                try:
+                    path, err = fut.result()
+                except ApiError:
+                    # Bad token or no network: the other documents would fail
+                    # the same way, so drop them instead of listing N errors.
+                    ex.shutdown(wait=False, cancel_futures=True)
+                    raise
                 if err:
                     errors.append((doc_id, err))
                 else:
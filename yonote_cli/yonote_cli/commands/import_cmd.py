@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 
 from ..core import (
     get_base_and_token,
@@ -14,10 +17,43 @@ from ..core import (
 )
 
 
-def _collect_md_files(path: Path) -> List[Path]:
-    """Return all ``.md`` files under ``path`` recursively."""
+def _count_md_files(path: Path) -> int:
+    """Return the number of ``.md`` files under ``path``.
 
-    return [p for p in path.rglob("*.md") if p.is_file()]
+    Uses the same rules as the import walk (case-insensitive suffix, followed
+    directory links) and ``os.scandir`` so no file list is built.
+    """
+
+    count = 0
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(".md"):
+                    count += 1
+    return count
+
+
+# Files read from disk ahead of the document being uploaded.
+_READ_AHEAD = 4
+
+
+def _read_ahead(paths: List[Path], executor: ThreadPoolExecutor) -> Iterator[Tuple[Path, Future]]:
+    """Yield ``(path, future)`` pairs with the text of each file being read.
+
+    Up to ``_READ_AHEAD`` reads run ahead of the pair last yielded, so disk
+    reads overlap with the uploads instead of waiting for them.
+    """
+
+    pending: deque = deque()
+    for path in paths:
+        pending.append((path, executor.submit(path.read_text, encoding="utf-8")))
+        if len(pending) > _READ_AHEAD:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
 
 
 def cmd_import(args):
@@ -25,8 +61,8 @@ def cmd_import(args):
 
     base, token = get_base_and_token()
     src_dir = Path(args.src_dir).resolve()
-    files = _collect_md_files(src_dir)
-    if not files:
+    total = _count_md_files(src_dir)
+    if not total:
         print("Нет файлов *.md для импорта")
         return
 
@@ -41,7 +77,7 @@ def cmd_import(args):
         )
         from InquirerPy import inquirer  # local import to avoid hard dep
 
-        msg = f"Импортировать {len(files)} документов в раздел \"{label}\"?"
+        msg = f"Импортировать {total} документов в раздел \"{label}\"?"
         if _execute(inquirer.confirm(message=msg, default=True)):
             break
 
@@ -72,15 +108,27 @@ def cmd_import(args):
     def _import_dir(path: Path, parent: Optional[str]):
         """Recursively import documents from ``path``."""
 
-        for entry in sorted(path.iterdir()):
-            if entry.is_dir():
+        # (entry, is_dir) for sub-directories and Markdown files, in name order.
+        # ``os.scandir`` answers the type checks from the directory listing
+        # instead of a stat call per entry.
+        entries: List[Tuple[Path, bool]] = []
+        with os.scandir(path) as it:
+            for de in sorted(it, key=lambda de: de.name):
+                if de.is_dir():
+                    entries.append((Path(de.path), True))
+                elif de.is_file() and de.name.lower().endswith(".md"):
+                    entries.append((Path(de.path), False))
+        reads = _read_ahead([e for e, is_dir in entries if not is_dir], reader)
+        for entry, is_dir in entries:
+            if is_dir:
                 # Create a folder document and import its children.
                 doc_id = _create_doc(entry.name, "", parent)
                 if doc_id:
                     _import_dir(entry, doc_id)
-            elif entry.is_file() and entry.suffix.lower() == ".md":
+            else:
+                _, future = next(reads)
                 try:
-                    content = entry.read_text(encoding="utf-8")
+                    content = future.result()
                 except Exception as e:
                     errors.append((str(entry), ensure_text(str(e))))
                     bar.update(1)
@@ -88,10 +136,12 @@ def cmd_import(args):
                 _create_doc(entry.stem, content, parent)
                 bar.update(1)
 
-    with tqdm(total=len(files), unit="doc", desc="Importing") as bar:
+    with tqdm(total=total, unit="doc", desc="Importing") as bar, ThreadPoolExecutor(
+        max_workers=_READ_AHEAD
+    ) as reader:
         _import_dir(src_dir, parent_id)
 
-    print(f"Imported {len(files)-len(errors)}/{len(files)} documents from {src_dir}")
+    print(f"Imported {total-len(errors)}/{total} documents from {src_dir}")
     if errors:
         print(f"Errors ({len(errors)}):")
         for name, err in errors[:10]:
@@ -1,34 +1,55 @@
-"""Core utilities for yonote CLI."""
-
-from .config import CONFIG_PATH, CACHE_PATH, DEFAULT_BASE, API_MAX_LIMIT, load_config, save_config, get_base_and_token
-from .http import http_json, http_multipart_post
-from .utils import (
-    fetch_all_concurrent,
-    format_rows,
-    safe_name,
-    ensure_text,
-    export_document_content,
-    tqdm,
-)
-from .cache import load_cache, save_cache, list_documents_in_collection, list_collections
-from .interactive import (
-    interactive_select_documents,
-    interactive_pick_parent,
-    interactive_browse_for_export,
-    interactive_pick_destination,
-)
-
-__all__ = [
-    "CONFIG_PATH", "CACHE_PATH", "DEFAULT_BASE", "API_MAX_LIMIT",
-    "load_config", "save_config", "get_base_and_token",
-    "http_json", "http_multipart_post",
-    "fetch_all_concurrent",
-    "format_rows",
-    "safe_name",
-    "ensure_text",
-    "export_document_content",
-    "tqdm",
-    "load_cache", "save_cache", "list_documents_in_collection", "list_collections",
-    "interactive_select_documents", "interactive_pick_parent", "interactive_browse_for_export",
-    "interactive_pick_destination",
-]
+"""Core utilities for yonote CLI.
+
+Names are imported from their submodules on first access, so that e.g.
+``yonote --help`` can read ``DEFAULT_BASE`` without loading the progress bar
+and interactive prompt libraries.
+"""
+
+import importlib
+
+# Public name -> submodule defining it.
+_EXPORTS = {
+    "CONFIG_PATH": "config",
+    "CACHE_PATH": "config",
+    "DEFAULT_BASE": "config",
+    "API_MAX_LIMIT": "config",
+    "load_config": "config",
+    "save_config": "config",
+    "get_base_and_token": "config",
+    "ApiError": "http",
+    "http_json": "http",
+    "http_multipart_post": "http",
+    "fetch_all_concurrent": "utils",
+    "format_rows": "utils",
+    "print_json": "utils",
+    "safe_name": "utils",
+    "ensure_text": "utils",
+    "ensure_bytes": "utils",
+    "export_document_content": "utils",
+    "export_document_to_file": "utils",
+    "tqdm": "utils",
+    "load_cache": "cache",
+    "save_cache": "cache",
+    "list_documents_in_collection": "cache",
+    "list_collections": "cache",
+    "interactive_select_documents": "interactive",
+    "interactive_pick_parent": "interactive",
+    "interactive_browse_for_export": "interactive",
+    "interactive_pick_destination": "interactive",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
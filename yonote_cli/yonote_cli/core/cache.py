@@ -2,27 +2,138 @@
 
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List
+import atexit
+import copy
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
 
 from .config import CACHE_PATH, API_MAX_LIMIT
+from .http import _dumps, _loads
 from .utils import fetch_all_concurrent
 
 
+# The parsed cache file and the (path, mtime, size) it was read at.
+_cache_memo: Tuple[Tuple[str, int, int], dict] | None = None
+
+
 def load_cache() -> dict:
-    if CACHE_PATH.exists():
+    """Return the contents of the cache file.
+
+    The parsed file is reused for as long as its modification time and size
+    stay the same, so the many lookups of one command read it once.  Each
+    call returns a new top-level dict, but nested values are shared: replace
+    them instead of modifying them in place.
+    """
+    global _cache_memo
+    try:
+        st = CACHE_PATH.stat()
+    except OSError:
+        return {}
+    key = (str(CACHE_PATH), st.st_mtime_ns, st.st_size)
+    memo = _cache_memo
+    if memo is None or memo[0] != key:
         try:
-            return json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+            data = _loads(CACHE_PATH.read_bytes())
         except Exception:
-            return {}
-    return {}
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        memo = _cache_memo = (key, data)
+    return dict(memo[1])
 
 
 def save_cache(cache: dict) -> None:
+    global _cache_memo
+    # Compact JSON: the cache is not meant to be read by people, and indenting
+    # it roughly triples its size and the time to write it.
     try:
-        CACHE_PATH.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+        CACHE_PATH.write_bytes(_dumps(cache))
     except Exception:
         pass
+    _cache_memo = None
+
+
+# Resolved user/group ids live under ``"ids"`` in the cache file, as
+# ``{base: {kind: {ident: [id, saved_at]}}}``.  They are loaded on first use,
+# kept in memory and written back once when the process exits.
+ID_CACHE_TTL = 24 * 60 * 60
+
+_ids: Dict[str, Any] | None = None
+_ids_dirty = False
+_ids_lock = threading.Lock()
+
+
+def _id_table(base: str, kind: str) -> Dict[str, list]:
+    """Return the ``kind`` table for ``base``; call with ``_ids_lock`` held."""
+    global _ids
+    if _ids is None:
+        _ids = copy.deepcopy(load_cache().get("ids", {}))
+    return _ids.setdefault(base, {}).setdefault(kind, {})
+
+
+def _mark_ids_dirty() -> None:
+    """Schedule ``flush_ids`` at exit; call with ``_ids_lock`` held."""
+    global _ids_dirty
+    if not _ids_dirty:
+        _ids_dirty = True
+        atexit.register(flush_ids)
+
+
+def lookup_id(kind: str, base: str, ident: str) -> str | None:
+    """Return the cached id of ``ident`` unless missing or older than the TTL."""
+    with _ids_lock:
+        entry = _id_table(base, kind).get(ident)
+    if entry and time.time() - entry[1] < ID_CACHE_TTL:
+        return entry[0]
+    return None
+
+
+def remember_ids(kind: str, base: str, ids: Dict[str, str]) -> None:
+    """Cache ``ident -> id`` pairs for later ``lookup_id`` calls."""
+    now = time.time()
+    with _ids_lock:
+        table = _id_table(base, kind)
+        for ident, value in ids.items():
+            table[ident] = [value, now]
+        _mark_ids_dirty()
+
+
+def forget_id(kind: str, base: str, value: str) -> None:
+    """Drop every cached ident resolving to the id ``value``.
+
+    Used after deleting or renaming the entity: it may be cached under
+    names other than the one the command was given, e.g. its email when it
+    was deleted by id.
+    """
+    with _ids_lock:
+        table = _id_table(base, kind)
+        stale = [ident for ident, entry in table.items() if entry[0] == value]
+        for ident in stale:
+            del table[ident]
+        if stale:
+            _mark_ids_dirty()
+
+
+def clear_ids() -> None:
+    """Forget every cached id."""
+    global _ids
+    with _ids_lock:
+        _ids = {}
+        _mark_ids_dirty()
+
+
+def flush_ids() -> None:
+    """Write cached ids back to the cache file if they changed."""
+    global _ids_dirty
+    with _ids_lock:
+        if not _ids_dirty:
+            return
+        cache = load_cache()
+        cache["ids"] = _ids
+        save_cache(cache)
+        _ids_dirty = False
 
 
 def list_collections(
@@ -113,12 +224,19 @@ def refresh_document_branch(
         desc=desc,
     )
 
+    # Drop the cached subtree below ``parent_id``, walking a parent -> child
+    # ids index built in one pass instead of rescanning ``docs`` per node.
+    child_ids: Dict[Any, List[Any]] = defaultdict(list)
+    for d in docs:
+        child_ids[d.get("parentDocumentId")].append(d.get("id"))
     to_remove: set[str] = set()
-    stack = [d.get("id") for d in docs if d.get("parentDocumentId") == parent_id]
+    stack = list(child_ids.get(parent_id, ()))
     while stack:
         cur = stack.pop()
+        if cur in to_remove:
+            continue
         to_remove.add(cur)
-        stack.extend(d.get("id") for d in docs if d.get("parentDocumentId") == cur)
+        stack.extend(child_ids.get(cur, ()))
 
     docs = [d for d in docs if d.get("id") not in to_remove]
     docs.extend(new_children)
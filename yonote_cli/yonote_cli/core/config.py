@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import os
+import stat
 import sys
 from pathlib import Path
 from typing import Any, Dict, Tuple
@@ -16,8 +18,8 @@ DEFAULT_BASE = "https://app.yonote.ru/api"
 API_MAX_LIMIT = 100
 
 
-def load_config() -> Dict[str, Any]:
-    """Load configuration from disk and environment."""
+def _read_config() -> Dict[str, Any]:
+    """Read configuration from disk and environment."""
     cfg: Dict[str, Any] = {}
     if CONFIG_PATH.exists():
         try:
@@ -31,14 +33,64 @@ def load_config() -> Dict[str, Any]:
     return cfg
 
 
+@functools.lru_cache(maxsize=1)
+def load_config() -> Dict[str, Any]:
+    """Load configuration from disk and environment.
+
+    The result is cached for the life of the process and must not be mutated;
+    ``save_config`` refreshes it.
+    """
+    return _read_config()
+
+
+def _write_config(text: str) -> None:
+    """Replace CONFIG_PATH with ``text`` through a temporary file.
+
+    The temporary file gets the mode of the current config (``0600`` for a
+    new one), so the token does not become readable by others.  If the file
+    cannot be replaced, e.g. ``EBUSY`` because ``yonote.sh`` bind-mounts it
+    into the container, it is rewritten in place instead.
+    """
+    try:
+        mode = stat.S_IMODE(CONFIG_PATH.stat().st_mode)
+    except OSError:
+        mode = 0o600
+    tmp = CONFIG_PATH.with_name(CONFIG_PATH.name + ".tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, "wb") as f:
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), mode)  # a leftover tmp file keeps its mode
+            f.write(text.encode("utf-8"))
+        os.replace(tmp, CONFIG_PATH)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        CONFIG_PATH.write_text(text, encoding="utf-8")
+
+
 def save_config(base_url: str | None, token: str | None) -> None:
-    """Persist configuration to CONFIG_PATH."""
-    cfg = load_config()
+    """Persist configuration to CONFIG_PATH.
+
+    The file is left alone when its content would not change.  Otherwise it
+    is written to a temporary file first and moved into place, so a failed
+    write cannot leave a truncated config behind.
+    """
+    cfg = _read_config()
     if base_url is not None:
         cfg["base_url"] = base_url.rstrip("/")
     if token is not None:
         cfg["token"] = token
-    CONFIG_PATH.write_text(json.dumps(cfg, ensure_ascii=False, indent=2), encoding="utf-8")
+    text = json.dumps(cfg, ensure_ascii=False, indent=2)
+    try:
+        unchanged = CONFIG_PATH.read_text(encoding="utf-8") == text
+    except (OSError, UnicodeDecodeError):
+        unchanged = False
+    if not unchanged:
+        _write_config(text)
+        load_config.cache_clear()
     print(f"Saved config to {CONFIG_PATH}")
 
 
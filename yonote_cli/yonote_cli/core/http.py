@@ -1,18 +1,292 @@
 """Minimal HTTP helpers for the CLI.
 
-The implementation uses :mod:`urllib` from the Python standard library to
-avoid external dependencies.  Functions are intentionally small and
-well-commented so they can be modified easily if the API changes.
+The implementation uses :mod:`urllib` and :mod:`http.client` from the Python
+standard library to avoid external dependencies.  Functions are intentionally
+small and well-commented so they can be modified easily if the API changes.
 """
 
 from __future__ import annotations
 
+import functools
 import json
+import os
+import shutil
+import ssl
+import threading
+import time
 import uuid
 import sys
-from typing import Any, Dict
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
 from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from urllib.parse import urljoin, urlsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener, getproxies, proxy_bypass
+from urllib.request import urlopen as _urllib_urlopen
+from urllib.response import addinfourl
+
+# --- JSON (orjson when available) ---
+try:  # pragma: no cover - optional speedup
+    import orjson  # type: ignore
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except Exception:  # pragma: no cover
+    def _dumps(obj: Any) -> bytes:
+        # Same compact UTF-8 output as orjson.
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+class ApiError(SystemExit):
+    """An API request failed; the reason has already been printed to stderr.
+
+    It is a :class:`SystemExit` with status 2, so left uncaught it ends the
+    CLI the way the plain ``sys.exit(2)`` it replaces did, and existing
+    ``except SystemExit`` handlers keep working.  ``status`` is the HTTP
+    status, or ``None`` for network errors.
+    """
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(2)
+        self.message = message
+        self.status = status
+
+    def __str__(self) -> str:
+        return self.message
+
+    @property
+    def fatal(self) -> bool:
+        """Whether every other request would fail the same way.
+
+        True for network errors and rejected credentials, which should stop
+        a batch instead of being reported once per item.
+        """
+        return self.status in (None, 401, 403)
+
+
+# Idle keep-alive connections kept per (scheme, host, port).
+POOL_SIZE = 32
+
+_pool: Dict[Tuple[str, str, int], List[HTTPConnection]] = {}
+_pool_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """Return the TLS context shared by all pooled HTTPS connections.
+
+    Building a context loads the system CA bundle, which is too slow to repeat
+    for every connection a worker pool opens.
+    """
+    return ssl.create_default_context()
+
+
+def _acquire(key: Tuple[str, str, int], timeout: float, fresh: bool = False) -> Tuple[HTTPConnection, bool]:
+    """Return an idle pooled connection for ``key`` or a new one.
+
+    The flag tells whether the connection was reused, i.e. whether the server
+    may have closed it in the meantime.  ``fresh`` always opens a new one.
+    """
+    conn = None
+    if not fresh:
+        with _pool_lock:
+            idle = _pool.get(key)
+            conn = idle.pop() if idle else None
+    if conn is not None:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+    scheme, host, port = key
+    if scheme == "https":
+        return HTTPSConnection(host, port, timeout=timeout, context=_ssl_context()), False
+    return HTTPConnection(host, port, timeout=timeout), False
+
+
+def reserve_connections(count: int) -> None:
+    """Keep at least ``count`` idle connections per host in the pool.
+
+    Commands running ``count`` requests at once call this so that every
+    worker's connection can be reused instead of being closed on release.
+    """
+    global POOL_SIZE
+    with _pool_lock:
+        POOL_SIZE = max(POOL_SIZE, count)
+
+
+def _discard_idle(key: Tuple[str, str, int]) -> None:
+    """Close every idle connection for ``key``.
+
+    Called when a reused connection turns out to be closed: the server drops
+    idle connections after a timeout, so the others are most likely gone too.
+    """
+    with _pool_lock:
+        idle = _pool.pop(key, [])
+    for conn in idle:
+        conn.close()
+
+
+def _release(key: Tuple[str, str, int], conn: HTTPConnection) -> None:
+    """Return ``conn`` to the pool, closing it if the pool is full."""
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+# Read size used when copying a response body into a file.
+_DOWNLOAD_CHUNK = 64 * 1024
+
+
+def _send(req: Request, timeout: float, sink=None):
+    """Send ``req`` on a pooled connection; return the response and its body.
+
+    With a binary file ``sink`` a successful body is copied into it as it
+    arrives and the returned body is empty.
+    """
+    parts = urlsplit(req.full_url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    key = (parts.scheme, parts.hostname, port)
+    headers = dict(req.header_items())
+    for attempt in range(2):
+        conn, reused = _acquire(key, timeout, fresh=attempt > 0)
+        try:
+            conn.request(req.get_method(), req.selector, body=req.data, headers=headers)
+            resp = conn.getresponse()
+            if sink is not None and 200 <= resp.status < 300:
+                shutil.copyfileobj(resp, sink, _DOWNLOAD_CHUNK)
+                body = b""
+            else:
+                body = resp.read()
+        except (HTTPException, ConnectionError) as e:
+            conn.close()
+            # An idle connection the server already closed; retry on a newly
+            # opened one, since the rest of the pool is likely stale as well.
+            if reused and attempt == 0:
+                _discard_idle(key)
+                if sink is not None:
+                    sink.seek(0)
+                    sink.truncate()
+                continue
+            raise URLError(e)
+        except OSError as e:
+            conn.close()
+            raise URLError(e)
+        if resp.will_close:
+            conn.close()
+        else:
+            _release(key, conn)
+        return resp, body
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    """Redirect handler that leaves 3xx responses to the caller."""
+
+    def redirect_request(self, req, fp, code, msg, hdrs, newurl):
+        return None
+
+
+def urlopen(req: Request, timeout: float = 60, follow_redirects: bool = True, sink=None):
+    """Open ``req`` over a pooled keep-alive connection.
+
+    A stand-in for :func:`urllib.request.urlopen` covering what this module
+    needs: the response is a context manager with ``headers`` and ``read()``,
+    error statuses raise :class:`HTTPError` and network failures
+    :class:`URLError`.  Redirects are followed the way urllib follows them
+    unless ``follow_redirects`` is false, in which case they raise
+    :class:`HTTPError` carrying the ``Location`` header.  Requests that have
+    to go through a proxy are handed to urllib itself.
+
+    If ``sink`` is a binary file, the body of a successful response is
+    streamed into it instead of being kept in the returned response.
+    """
+    for _ in range(HTTPRedirectHandler.max_redirections + 1):
+        parts = urlsplit(req.full_url)
+        if parts.scheme not in ("http", "https") or (
+            getproxies() and not proxy_bypass(parts.hostname)
+        ):
+            if follow_redirects:
+                resp = _urllib_urlopen(req, timeout=timeout)
+            else:
+                resp = build_opener(_NoRedirect).open(req, timeout=timeout)
+            if sink is None:
+                return resp
+            with resp:
+                shutil.copyfileobj(resp, sink, _DOWNLOAD_CHUNK)
+            return addinfourl(BytesIO(b""), resp.headers, resp.geturl(), resp.status)
+        resp, body = _send(req, timeout, sink)
+        location = resp.headers.get("Location")
+        if follow_redirects and resp.status in (301, 302, 303, 307, 308) and location:
+            newurl = urljoin(req.full_url, location)
+            fp = BytesIO(body)
+            req = HTTPRedirectHandler().redirect_request(
+                req, fp, resp.status, resp.reason, resp.headers, newurl
+            )
+            continue
+        if resp.status >= 300:
+            raise HTTPError(req.full_url, resp.status, resp.reason, resp.headers, BytesIO(body))
+        return addinfourl(BytesIO(body), resp.headers, req.full_url, resp.status)
+    raise HTTPError(req.full_url, resp.status, "Too many redirects", resp.headers, BytesIO(body))
+
+
+# Statuses telling that the server turned the request away without acting
+# on it, so sending it again is safe even for non-idempotent calls.
+_RETRY_STATUSES = (429, 503)
+RETRIES = 3
+_BACKOFF = 0.3
+_MAX_RETRY_AFTER = 30.0
+
+
+def _retry_delay(e: HTTPError, attempt: int) -> float:
+    """Return how long to wait before retrying the request refused with ``e``."""
+    try:
+        delay = float(e.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        # No header or an HTTP date: back off exponentially instead.
+        delay = _BACKOFF * 2 ** attempt
+    return min(max(delay, 0.0), _MAX_RETRY_AFTER)
+
+
+def _open(req: Request, timeout: float):
+    """:func:`urlopen` retrying requests refused as rate limited or unavailable."""
+    for attempt in range(RETRIES + 1):
+        try:
+            return urlopen(req, timeout=timeout)
+        except HTTPError as e:
+            if e.code not in _RETRY_STATUSES or attempt == RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            e.close()
+        time.sleep(delay)
+
+
+def _read_body(resp) -> Dict[str, Any] | bytes:
+    """Return the parsed JSON body of ``resp``, or the raw bytes otherwise."""
+    ctype = (resp.headers.get("Content-Type") or "").lower()
+    raw = resp.read()
+    if "application/json" in ctype:
+        try:
+            return _loads(raw)
+        except Exception:
+            # Return raw bytes if the body is not valid JSON
+            return raw
+    return raw
+
+
+@functools.lru_cache(maxsize=8)
+def _auth_headers(token: str, json_body: bool = False) -> Dict[str, str]:
+    """Return the headers of an API request made with ``token``.
+
+    The dict is shared between calls, so callers must copy it before adding
+    headers of their own.
+    """
+    headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
 
 
 def http_json(
@@ -23,36 +297,73 @@ def http_json(
 ) -> Dict[str, Any] | bytes:
     """Perform an HTTP request and return parsed JSON or raw bytes."""
 
-    headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
-    data = None
-    if payload is not None:
-        # JSON body for POST/PUT requests
-        headers["Content-Type"] = "application/json"
-        data = json.dumps(payload).encode("utf-8")
+    # JSON body for POST/PUT requests
+    data = None if payload is None else _dumps(payload)
+    headers = _auth_headers(token, data is not None)
     req = Request(url=url, method=method.upper(), headers=headers, data=data)
     try:
-        with urlopen(req, timeout=60) as resp:
-            ctype = (resp.headers.get("Content-Type") or "").lower()
-            raw = resp.read()
-            if "application/json" in ctype:
-                try:
-                    return json.loads(raw.decode("utf-8"))
-                except Exception:
-                    # Return raw bytes if the body is not valid JSON
-                    return raw
-            return raw
+        with _open(req, 60) as resp:
+            return _read_body(resp)
     except HTTPError as e:
         _handle_http_error(e)
     except URLError as e:
-        print(f"Network error: {e.reason}", file=sys.stderr)
-        sys.exit(2)
+        _network_error(e)
+
+
+def _guess_type(filename: str) -> str:
+    """Return the MIME type for ``filename``.
+
+    :mod:`mimetypes` is imported here because only uploads without an explicit
+    content type need it.
+    """
+    import mimetypes
+
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+# Read size used when streaming file parts of a multipart body.
+_UPLOAD_CHUNK = 64 * 1024
+
+# Part headers of a multipart body.
+_FIELD_HEADER = 'Content-Disposition: form-data; name="{}"\r\n\r\n'
+_FILE_HEADER = (
+    'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'
+    "Content-Type: {}\r\n\r\n"
+)
+
+
+class _MultipartBody:
+    """Multipart body made of byte strings and files streamed from disk.
+
+    Each iteration reopens the files, so the body can be sent again when a
+    pooled connection turns out to be stale.
+    """
+
+    def __init__(self, parts: List[bytes | os.PathLike]):
+        self.parts = parts
+
+    def __len__(self) -> int:
+        return sum(
+            len(part) if isinstance(part, bytes) else os.path.getsize(part)
+            for part in self.parts
+        )
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            with open(part, "rb") as f:
+                yield from iter(lambda: f.read(_UPLOAD_CHUNK), b"")
 
 
 def http_multipart_post(url: str, token: str, fields: Dict[str, object]) -> Dict[str, Any] | bytes:
     """Send a multipart/form-data POST request.
 
     ``fields`` is a mapping where each value is either a simple string/bytes or
-    a tuple ``(filename, content, ctype)`` for file uploads.
+    a tuple ``(filename, content, ctype)`` for file uploads.  ``content`` may
+    be a path, in which case the file is streamed from disk instead of being
+    read into memory.
     """
 
     boundary = f"----yonotecli{uuid.uuid4().hex}"
@@ -60,65 +371,68 @@ def http_multipart_post(url: str, token: str, fields: Dict[str, object]) -> Dict
     def to_b(x):
         return x if isinstance(x, (bytes, bytearray)) else str(x).encode("utf-8")
 
-    parts: list[bytes] = []
+    # Header bytes are accumulated in ``pending`` and flushed as one part
+    # whenever a file has to be inserted.
+    parts: List[bytes | os.PathLike] = []
+    pending = bytearray()
+    separator = f"--{boundary}\r\n".encode()
     for name, value in (fields or {}).items():
-        parts.append(f"--{boundary}\r\n".encode())
+        pending += separator
         if isinstance(value, tuple):
             filename, content, ctype = value
             if ctype is None:
-                import mimetypes
-                ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
-            parts.append(
-                f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode()
-            )
-            parts.append(f"Content-Type: {ctype}\r\n\r\n".encode())
-            parts.append(to_b(content))
-            parts.append(b"\r\n")
+                ctype = _guess_type(filename)
+            pending += _FILE_HEADER.format(name, filename, ctype).encode()
+            if isinstance(content, os.PathLike):
+                parts.append(bytes(pending))
+                parts.append(content)
+                pending.clear()
+            else:
+                pending += to_b(content)
+            pending += b"\r\n"
         else:
-            parts.append(f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode())
-            parts.append(to_b(value))
-            parts.append(b"\r\n")
-    parts.append(f"--{boundary}--\r\n".encode())
-    body = b"".join(parts)
-
-    headers = {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {token}",
-        "Content-Type": f"multipart/form-data; boundary={boundary}",
-    }
+            pending += _FIELD_HEADER.format(name).encode()
+            pending += to_b(value)
+            pending += b"\r\n"
+    pending += f"--{boundary}--\r\n".encode()
+    parts.append(bytes(pending))
+    body = _MultipartBody(parts)
+
+    headers = dict(_auth_headers(token))
+    headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+    headers["Content-Length"] = str(len(body))
     req = Request(url=url, method="POST", headers=headers, data=body)
     try:
-        with urlopen(req, timeout=120) as resp:
-            ctype = (resp.headers.get("Content-Type") or "").lower()
-            raw = resp.read()
-            if "application/json" in ctype:
-                try:
-                    return json.loads(raw.decode("utf-8"))
-                except Exception:
-                    return raw
-            return raw
+        with _open(req, 120) as resp:
+            return _read_body(resp)
     except HTTPError as e:
         _handle_http_error(e)
     except URLError as e:
-        print(f"Network error: {e.reason}", file=sys.stderr)
-        sys.exit(2)
+        _network_error(e)
+
+
+def _network_error(e: URLError) -> None:
+    message = f"Network error: {e.reason}"
+    print(message, file=sys.stderr)
+    raise ApiError(message)
 
 
 def _handle_http_error(e: HTTPError) -> None:
-    body = e.read().decode("utf-8", errors="ignore")
-    message = body
+    raw = e.read()
+    message = raw.decode("utf-8", errors="ignore")
     try:
-        data = json.loads(body)
+        data = _loads(raw)
         if isinstance(data, dict) and data.get("error"):
             message = data["error"]
     except Exception:
         pass
 
     if e.code == 401:
-        print(f"Authentication failed: {message}", file=sys.stderr)
+        message = f"Authentication failed: {message}"
     elif e.code == 403:
-        print(f"Forbidden: {message} (are you an administrator?)", file=sys.stderr)
+        message = f"Forbidden: {message} (are you an administrator?)"
     else:
-        print(f"[HTTP {e.code}] {message}", file=sys.stderr)
-    sys.exit(2)
+        message = f"[HTTP {e.code}] {message}"
+    print(message, file=sys.stderr)
+    raise ApiError(message, e.code)
 
@@ -33,23 +33,48 @@ def _execute(prompt):
         sys.exit(1)
 
 
-def _build_breadcrumbs(doc: dict, by_id: Dict[str, dict]) -> str:
-    """Return a human readable path for ``doc`` using ``title`` fields."""
+def _build_breadcrumbs(
+    doc: dict, by_id: Dict[str, dict], memo: Dict[str, str] | None = None
+) -> str:
+    """Return a human readable path for ``doc`` using ``title`` fields.
+
+    ``memo`` maps document ids to their paths.  Sharing one dict across all
+    documents of a listing lets the walk stop at the first ancestor whose
+    path is already known, so each ancestor is walked once.
+    """
 
-    parts = [doc.get("title") or "(untitled)"]
+    if memo is None:
+        memo = {}
+    if doc.get("id") in memo:
+        return memo[doc["id"]]
+    chain = [doc]  # ``doc`` and its ancestors, nearest first
+    prefix: str | None = None
     seen = set()
+    cyclic = False
     cur = doc
     while True:
         pid = cur.get("parentDocumentId")
-        if not pid or pid in seen:
+        if not pid:
+            break
+        if pid in seen:
+            cyclic = True
+            break
+        if pid in memo:
+            prefix = memo[pid]
             break
         seen.add(pid)
         p = by_id.get(pid)
         if not p:
             break
-        parts.insert(0, p.get("title") or "(untitled)")
+        chain.append(p)
         cur = p
-    return " / ".join(parts)
+    for d in reversed(chain):
+        title = d.get("title") or "(untitled)"
+        prefix = title if prefix is None else f"{prefix} / {title}"
+        # A path cut short by a parent cycle depends on where the walk began.
+        if not cyclic and d.get("id"):
+            memo[d["id"]] = prefix
+    return prefix
 
 
 def interactive_select_documents(docs: List[dict], multiselect: bool = True) -> List[str]:
@@ -67,9 +92,10 @@ def interactive_select_documents(docs: List[dict], multiselect: bool = True) ->
         sys.exit(2)
 
     by_id = {d.get("id"): d for d in docs}
+    memo: Dict[str, str] = {}
     choices = []
     for d in docs:
-        bc = _build_breadcrumbs(d, by_id)
+        bc = _build_breadcrumbs(d, by_id, memo)
         label = f"{bc}  [{d.get('id')}]"
         choices.append({"name": label, "value": d.get("id")})
     choices.sort(key=lambda x: x["name"].lower())
@@ -122,11 +148,12 @@ def interactive_pick_parent(docs: List[dict], allow_none: bool = True) -> Option
         sys.exit(2)
 
     by_id = {d.get("id"): d for d in docs}
+    memo: Dict[str, str] = {}
     choices = []
     if allow_none:
         choices.append({"name": "(no parent) — в корень коллекции", "value": None})
     for d in docs:
-        bc = _build_breadcrumbs(d, by_id)
+        bc = _build_breadcrumbs(d, by_id, memo)
         label = f"{bc}  [{d.get('id')}]"
         choices.append({"name": label, "value": d.get("id")})
     choices.sort(key=lambda x: (x["name"] or "").lower())
@@ -173,7 +200,6 @@ def interactive_browse_for_export(
         workers=workers,
         desc=None,
     )
-    cols_by_id = {c.get("id"): c for c in collections}
     selected_docs: set[str] = set()
     selected_cols: set[str] = set()
 
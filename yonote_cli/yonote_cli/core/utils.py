@@ -3,16 +3,19 @@
 from __future__ import annotations
 
 import json
+import os
 import re
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from pathlib import Path
 from typing import Any, Dict, List
 from urllib.error import HTTPError, URLError
-from urllib.request import HTTPRedirectHandler, Request, build_opener, urlopen
+from urllib.parse import urljoin
+from urllib.request import Request
 
 from .config import API_MAX_LIMIT
-from .http import http_json
+from .http import ApiError, _auth_headers, _dumps, _loads, http_json, urlopen
 
 # --- progress (tqdm) ---
 try:  # pragma: no cover - simple fallback
@@ -26,13 +29,22 @@ except Exception:  # pragma: no cover
         def __enter__(self): return self
         def __exit__(self, exc_type, exc, tb): self.close()
 
+# --- JSON output (orjson when available) ---
+try:  # pragma: no cover - optional speedup
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
 
 __all__ = [
     "fetch_all_concurrent",
     "format_rows",
+    "print_json",
     "safe_name",
     "ensure_text",
+    "ensure_bytes",
     "export_document_content",
+    "export_document_to_file",
     "tqdm",
 ]
 
@@ -58,11 +70,54 @@ def _post_page(base: str, token: str, path: str, params: Dict[str, Any], limit:
     data = http_json("POST", url, token, payload)
     if not isinstance(data, dict):
         return {"data": [], "pagination": {"total": 0}}
-    if "data" not in data:
-        data["data"] = data.get("results") or data.get("rows") or []
     return data
 
 
+# Keys list endpoints use for the page items, in order of preference.
+_ITEM_KEYS = ("data", "results", "rows")
+
+
+def _items_key(page: Dict[str, Any]) -> str:
+    """Return the key holding the items of ``page``.
+
+    Every page of one listing has the same shape, so this is worked out once
+    from the first page.
+    """
+    for key in _ITEM_KEYS:
+        if key in page:
+            return key
+    return "data"
+
+
+def _result_or_cancel(future: Future, executor: ThreadPoolExecutor):
+    """Return the result of ``future``, cancelling ``executor``'s queue if it failed.
+
+    A failed page (e.g. an :class:`ApiError` for a bad token) ends the listing,
+    so the requests still queued behind it are dropped instead of being sent
+    before the error can propagate.
+    """
+    try:
+        return future.result()
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def _is_last_page(page: Dict[str, Any], items: list, limit: int) -> bool:
+    """Return whether ``page`` ends its listing.
+
+    A short page always does.  A full page does when the API says so with
+    ``pagination.hasMore`` false or an empty ``pagination.nextPath``, which
+    saves asking for the pages after it.
+    """
+    if len(items) < limit:
+        return True
+    pagination = page.get("pagination") or {}
+    if pagination.get("hasMore") is False:
+        return True
+    return "nextPath" in pagination and not pagination["nextPath"]
+
+
 def fetch_all_concurrent(
     base: str,
     token: str,
@@ -91,69 +146,111 @@ def fetch_all_concurrent(
             bar.update(0)  # show bar immediately
 
         first = _post_page(base, token, path, params, limit, 0)
-        items = first.get("data") or []
+        items_key = _items_key(first)
+        items = first.get(items_key) or []
         results.extend(items)
         if desc:
             bar.update(1)
         total = first.get("pagination", {}).get("total")
 
-        if len(items) < limit or (isinstance(total, int) and len(results) >= total):
+        if _is_last_page(first, items, limit) or (isinstance(total, int) and len(results) >= total):
             if isinstance(total, int):
                 return results[:total]
             return results
 
-        next_offset = limit
-        while True:
-            if isinstance(total, int) and next_offset >= total:
-                break
-            offsets = list(range(next_offset, next_offset + limit * workers, limit))
-            if isinstance(total, int):
-                offsets = [off for off in offsets if off < total]
-            if not offsets:
-                break
-            stop = False
-            with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        if isinstance(total, int):
+            # Every remaining offset is known after the first page: fetch them
+            # all in one parallel pass and keep the pages in offset order.
+            offsets = range(limit, total, limit)
+            pages: Dict[int, list] = {}
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(offsets)))) as ex:
                 futures = {
                     ex.submit(_post_page, base, token, path, params, limit, off): off
                     for off in offsets
                 }
                 for fut in as_completed(futures):
-                    data = fut.result()
-                    page_items = data.get("data") or []
-                    results.extend(page_items)
+                    pages[futures[fut]] = _result_or_cancel(fut, ex).get(items_key) or []
                     if desc:
                         bar.update(1)
-                    if len(page_items) < limit:
-                        stop = True
-                    if isinstance(total, int) and len(results) >= total:
-                        stop = True
-            next_offset += limit * workers
-            if stop:
-                break
+            for off in offsets:
+                results.extend(pages[off])
+            return results[:total]
 
-    if isinstance(total, int):
-        return results[:total]
-    return results
+        # Without a total, fetch ``workers`` pages at a time, on one executor,
+        # until the last page.  Pages are joined in offset order, and whatever
+        # follows the last page is dropped.
+        next_offset = limit
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            while True:
+                offsets = range(next_offset, next_offset + limit * workers, limit)
+                round_pages: Dict[int, Dict[str, Any]] = {}
+                futures = {
+                    ex.submit(_post_page, base, token, path, params, limit, off): off
+                    for off in offsets
+                }
+                for fut in as_completed(futures):
+                    round_pages[futures[fut]] = _result_or_cancel(fut, ex)
+                    if desc:
+                        bar.update(1)
+                for off in offsets:
+                    page = round_pages[off]
+                    page_items = page.get(items_key) or []
+                    results.extend(page_items)
+                    if _is_last_page(page, page_items, limit):
+                        return results
+                next_offset += limit * workers
 
 
 def format_rows(rows: List[Dict[str, Any]], fields: List[str]) -> None:
+    """Print ``rows`` as a table of ``fields`` with a single write."""
     if not rows:
         print("(no data)")
         return
-    widths = [max(len(str(r.get(f, ""))) for r in rows + [dict(zip(fields, fields))]) for f in fields]
-    header = " | ".join(f.ljust(w) for f, w in zip(fields, widths))
-    sep = "-+-".join("-" * w for w in widths)
-    print(header)
-    print(sep)
-    for r in rows:
-        print(" | ".join(str(r.get(f, "")).ljust(w) for f, w in zip(fields, widths)))
+    cells = [[str(r.get(f, "")) for f in fields] for r in rows]
+    widths = [max(len(f), max(map(len, col))) for f, col in zip(fields, zip(*cells))]
+    line = " | ".join(f"{{:<{w}}}" for w in widths).format
+    out = [line(*fields), "-+-".join("-" * w for w in widths)]
+    out.extend(line(*row) for row in cells)
+    sys.stdout.write("\n".join(out) + "\n")
+
+
+def print_json(obj: Any) -> None:
+    """Print ``obj`` as JSON, indented by two spaces on a terminal.
+
+    Piped output is written compact, since whatever reads it does not need
+    the indentation.  With orjson available and a UTF-8 stdout the document
+    is encoded to bytes once and written to ``sys.stdout.buffer``; otherwise
+    ``json.dump`` streams it to stdout without building the whole string.
+    """
+    isatty = getattr(sys.stdout, "isatty", None)
+    pretty = bool(isatty and isatty())
+    out = getattr(sys.stdout, "buffer", None)
+    encoding = (getattr(sys.stdout, "encoding", None) or "").lower()
+    if orjson is not None and out is not None and encoding in ("utf-8", "utf8"):
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass  # e.g. integers orjson cannot represent
+        else:
+            sys.stdout.flush()
+            out.write(data + b"\n")
+            return
+    if pretty:
+        json.dump(obj, sys.stdout, ensure_ascii=False, indent=2)
+    else:
+        json.dump(obj, sys.stdout, ensure_ascii=False, separators=(",", ":"))
+    sys.stdout.write("\n")
+
+
+_UNSAFE_CHARS = re.compile(r"[\\/:*?\"<>|]")
+_WHITESPACE = re.compile(r"\s+")
 
 
 def safe_name(name: str, maxlen: int = 120) -> str:
     """Return a filesystem-safe representation of *name*."""
     name = (name or "").strip()
-    name = re.sub(r"[\\/:*?\"<>|]", "_", name)
-    name = re.sub(r"\s+", " ", name)
+    name = _UNSAFE_CHARS.sub("_", name)
+    name = _WHITESPACE.sub(" ", name)
     if len(name) > maxlen:
         name = name[:maxlen].rstrip()
     return name or "untitled"
@@ -187,6 +284,20 @@ def ensure_text(value: Any) -> str:
     return json.dumps(value, ensure_ascii=False)
 
 
+def ensure_bytes(value: Any) -> bytes:
+    """Return *value* as UTF-8 encoded bytes.
+
+    Raw bytes are passed through without the decode/encode round trip that
+    ``ensure_text`` would need; other representations go through it.
+    """
+
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return ensure_text(value).encode("utf-8")
+
+
 def export_document_content(base: str, token: str, doc_id: str) -> str:
     """Return exported document text.
 
@@ -196,59 +307,88 @@ def export_document_content(base: str, token: str, doc_id: str) -> str:
     always returns the document body as UTF-8 text.
     """
 
+    return _export_document(base, token, doc_id, ensure_text)
+
+
+def export_document_to_file(base: str, token: str, doc_id: str, dest: Path) -> None:
+    """Export ``doc_id`` into the file ``dest``.
+
+    A document served through a ``fileOperation`` download is streamed to disk
+    as it arrives instead of being held in memory.  The body goes to a
+    ``.part`` file that replaces ``dest`` only once the export succeeded.
+    """
+
+    tmp = dest.with_name(dest.name + ".part")
+    try:
+        body = _export_document(base, token, doc_id, ensure_bytes, tmp)
+        if body is not None:
+            tmp.write_bytes(body)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _export_document(base: str, token: str, doc_id: str, convert, dest: Path | None = None):
+    """Export ``doc_id`` and return its body passed through ``convert``.
+
+    With ``dest`` a ``fileOperation`` download is written to that file and
+    ``None`` is returned; bodies returned inline are still converted.
+    """
+
     data = http_json("POST", f"{base}/documents.export", token, {"id": doc_id})
 
     if isinstance(data, (bytes, bytearray)):
+        # Only a JSON envelope needs parsing; a plain Markdown body is passed
+        # on as is instead of being decoded for a parse that would fail.
+        if data[:64].lstrip()[:1] != b"{":
+            return convert(data)
         try:
-            data = json.loads(data.decode("utf-8"))
+            data = _loads(data)
         except Exception:
-            return ensure_text(data)
+            return convert(data)
 
     if isinstance(data, dict):
         content = data.get("data")
         if content is not None and not isinstance(content, dict):
-            return ensure_text(content)
+            return convert(content)
         fo = data.get("fileOperation")
         if not fo and isinstance(content, dict):
             fo = content.get("fileOperation")
         op_id = fo.get("id") if fo else None
         if op_id:
+            # Both the redirect lookup and the download of the presigned URL
+            # go through the pooled connections of ``core.http``.
             url = f"{base}/fileOperations.redirect"
-            payload = json.dumps({"id": op_id}).encode("utf-8")
-            headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {token}",
-            }
-
-            class _NoRedirect(HTTPRedirectHandler):
-                def redirect_request(self, req, fp, code, msg, hdrs, newurl):
-                    return None
-
-            opener = build_opener(_NoRedirect)
+            payload = _dumps({"id": op_id})
+            headers = _auth_headers(token, True)
             for _ in range(10):
                 req = Request(url=url, method="POST", headers=headers, data=payload)
                 try:
-                    resp = opener.open(req, timeout=60)
+                    resp = urlopen(req, timeout=60, follow_redirects=False)
                 except HTTPError as e:  # type: ignore[assignment]
                     resp = e
                 except URLError:
                     time.sleep(2)
                     continue
                 location = resp.headers.get("Location")
-                body = resp.read()
                 if location:
+                    final_req = Request(urljoin(url, location))
                     try:
-                        with urlopen(location, timeout=120) as final:
-                            return ensure_text(final.read())
+                        if dest is None:
+                            with urlopen(final_req, timeout=120) as final:
+                                return convert(final.read())
+                        with open(dest, "wb") as f:
+                            urlopen(final_req, timeout=120, sink=f)
+                        return None
                     except HTTPError as e:
-                        err_body = e.read().decode("utf-8", errors="ignore")
-                        print(f"[HTTP {e.code}] {err_body}", file=sys.stderr)
-                        sys.exit(2)
+                        message = f"[HTTP {e.code}] " + e.read().decode("utf-8", errors="ignore")
+                        print(message, file=sys.stderr)
+                        raise ApiError(message, e.code)
                     except URLError:
                         time.sleep(2)
                         continue
                 time.sleep(2)
             raise RuntimeError("export timed out")
 
-    return ensure_text(data)
+    return convert(data)